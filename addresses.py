@@ -0,0 +1,64 @@
+import re
+
+from eth_hash.auto import keccak
+
+from caching import LRUCache
+from configuration import ADDRESS_CACHE_SIZE
+
+# 40 hex digits with an optional lower case 0x prefix, matched with fullmatch so no trailing newline slips through
+HEX_ADDRESS = re.compile(r"(0x)?([0-9a-fA-F]{40})")
+
+# Cached result of an address that is not valid
+INVALID = object()
+
+# Checksum form of recently seen addresses, keyed by the address as received
+address_cache = LRUCache(ADDRESS_CACHE_SIZE)
+
+
+def checksum_encode(hex_digits):
+    """EIP-55: upper case every letter whose nibble in keccak256 of the lower case address is >= 8"""
+    hex_digits = hex_digits.lower()
+    digest = keccak(hex_digits.encode("ascii")).hex()
+
+    return "0x" + "".join(
+        digit.upper() if int(nibble, 16) >= 8 else digit
+        for digit, nibble in zip(hex_digits, digest)
+    )
+
+
+def _normalize(address):
+    match = HEX_ADDRESS.fullmatch(address)
+    if not match:
+        return INVALID
+
+    hex_digits = match.group(2)
+    checksum_address = checksum_encode(hex_digits)
+
+    # mixed case means the address carries a checksum, it has to be right
+    if not (hex_digits.islower() or hex_digits.isupper() or hex_digits.isdigit()):
+        if checksum_address[2:] != hex_digits:
+            return INVALID
+
+    return checksum_address
+
+
+def to_checksum_address(address):
+    """
+    Get EIP-55 checksum form of an address with or without 0x prefix, None if it is not valid.
+    Unlike eth_utils, an upper case 0X prefix is not accepted.
+    All lower or upper case addresses carry no checksum and are accepted as they are.
+    """
+    if not isinstance(address, str):
+        return None
+
+    checksum_address = address_cache.get(address)
+    if checksum_address is None:
+        checksum_address = _normalize(address)
+        address_cache.put(address, checksum_address)
+
+    return None if checksum_address is INVALID else checksum_address
+
+
+def is_valid_address(address):
+    """Validate eth address format, mixed case addresses must have a correct EIP-55 checksum"""
+    return to_checksum_address(address) is not None
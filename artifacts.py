@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import threading
+
+from caching import LRUCache
+from configuration import CONTRACT_CACHE_SIZE
+from utilities import get_web3, read_file
+
+ARTIFACTS_DIRECTORY = "./blockchain/output"
+MANIFEST_FILE = "manifest.json"
+
+
+def hash_bytecode(bytecode):
+    """Get sha256 hex digest of contract bytecode as written by utils/compile_contract.py"""
+    return hashlib.sha256(bytecode.strip().encode("utf-8")).hexdigest()
+
+
+class ContractArtifact:
+    """ABI, bytecode and bytecode hash of one compiled contract"""
+
+    def __init__(self, name, abi, bytecode):
+        self.name = name
+        self.abi = abi
+        self.bytecode = bytecode
+        self.bytecode_hash = hash_bytecode(bytecode)
+
+
+class ArtifactStore:
+    """
+    Compiled contracts of blockchain/output, read and parsed once per process.
+    Bytecode is checked against the hashes in manifest.json, so stale or partially
+    copied artifacts fail at startup instead of on the first order.
+    Contract objects are kept per (contract name, address) in a bounded LRU cache.
+    """
+
+    def __init__(self, directory, contract_cache_size):
+        self.directory = directory
+        self._artifacts = {}
+        self._lock = threading.Lock()
+        self._contracts = LRUCache(contract_cache_size)
+
+    def _manifest(self):
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {}
+        return json.loads(read_file(path))
+
+    def _read(self, name, manifest):
+        abi = json.loads(read_file(os.path.join(self.directory, f"{name}.abi")))
+        artifact = ContractArtifact(name, abi, read_file(os.path.join(self.directory, f"{name}.bin")))
+
+        expected = manifest.get(name)
+        if expected and expected != artifact.bytecode_hash:
+            raise Exception(f"Bytecode of {name} does not match {MANIFEST_FILE}, recompile the contracts")
+
+        return artifact
+
+    def load_all(self):
+        """Read every compiled contract of the directory, returns their names"""
+        manifest = self._manifest()
+        names = sorted(file_name[:-4] for file_name in os.listdir(self.directory) if file_name.endswith(".abi"))
+
+        artifacts = {name: self._read(name, manifest) for name in names}
+        with self._lock:
+            self._artifacts.update(artifacts)
+
+        return names
+
+    def get(self, name):
+        """Get ContractArtifact of a contract, read on first use if it was not loaded at startup"""
+        artifact = self._artifacts.get(name)
+        if artifact is not None:
+            return artifact
+
+        with self._lock:
+            if name not in self._artifacts:
+                self._artifacts[name] = self._read(name, self._manifest())
+            return self._artifacts[name]
+
+    def contract(self, name, address):
+        """Get web3 contract object of contract name deployed at checksum address"""
+        key = (name, address)
+
+        contract = self._contracts.get(key)
+        if contract is None:
+            contract = get_web3().eth.contract(address=address, abi=self.get(name).abi)
+            self._contracts.put(key, contract)
+
+        return contract
+
+    def stats(self):
+        """Get loaded artifacts and contract cache metrics"""
+        with self._lock:
+            artifacts = {name: artifact.bytecode_hash for name, artifact in self._artifacts.items()}
+
+        return {
+            "artifacts": artifacts,
+            "contracts": self._contracts.stats()
+        }
+
+
+# Compiled contracts of this process
+contract_artifacts = ArtifactStore(ARTIFACTS_DIRECTORY, CONTRACT_CACHE_SIZE)
@@ -0,0 +1,31 @@
+from bisect import bisect_left
+
+
+class PrefixIndex:
+    """Case insensitive prefix lookup over a sorted array of names"""
+
+    def __init__(self, names):
+        entries = sorted((name.lower(), name) for name in names)
+        self.keys = [key for key, _ in entries]
+        self.names = [name for _, name in entries]
+
+    def complete(self, prefix, limit):
+        """Get first limit names (alphabetically) starting with prefix"""
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+
+        result = []
+        for position in range(start, min(start + limit, len(self.keys))):
+            if not self.keys[position].startswith(prefix):
+                break
+            result.append(self.names[position])
+
+        return result
+
+
+def build_autocomplete_index(snapshot):
+    """Build product and category prefix indexes for a catalog snapshot"""
+    return {
+        "products": PrefixIndex(name for _, name, _ in snapshot.products),
+        "categories": PrefixIndex(snapshot.categories.keys())
+    }
@@ -0,0 +1,108 @@
+import collections
+import queue
+import statistics
+import threading
+import time
+from concurrent.futures import Future
+
+from contracts import deploy_order_contracts
+
+
+class OrderBatcher(threading.Thread):
+    """
+    Collects order contracts requested within `window` seconds (at most `max_size` orders)
+    and creates them on-chain with one batch transaction of the factory or registry.
+    submit() returns a Future that resolves to the contract address of the order,
+    orders whose future was cancelled before their batch is sent are left out.
+    Only CONTRACT_MODE clone and registry can create several orders with one transaction.
+    """
+
+    def __init__(self, window, max_size, history=1000):
+        super().__init__(name="order-batcher", daemon=True)
+        self.window = window
+        self.max_size = max_size
+        self._queue = queue.Queue()
+
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.orders = 0
+        self.failed_batches = 0
+        self._batch_sizes = collections.deque(maxlen=history)
+        self._latencies = collections.deque(maxlen=history)
+
+    def submit(self, order_id, customer_address, price):
+        """Queue contract creation of an order"""
+        future = Future()
+        self._queue.put(((order_id, customer_address, price), future, time.perf_counter()))
+        return future
+
+    def run(self):
+        while True:
+            batch = [
+                (order, future, submitted) for order, future, submitted in self._collect()
+                if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+
+            try:
+                addresses = deploy_order_contracts([order for order, _, _ in batch])
+            except Exception as e:
+                print(f"Warning: batch of {len(batch)} order contracts failed: {str(e)}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                self._record(batch, failed=True)
+                continue
+
+            for (_, future, _), address in zip(batch, addresses):
+                future.set_result(address)
+            self._record(batch, failed=False)
+
+    def _collect(self):
+        """Wait for the first order, then keep collecting until the window closes or the batch is full"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+
+        while len(batch) < self.max_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _record(self, batch, failed):
+        now = time.perf_counter()
+
+        with self._lock:
+            self.batches += 1
+            self._batch_sizes.append(len(batch))
+
+            if failed:
+                self.failed_batches += 1
+                return
+
+            self.orders += len(batch)
+            self._latencies.extend(now - submitted for _, _, submitted in batch)
+
+    def stats(self):
+        """Get batch size and submit-to-mined latency (ms) of recent batches"""
+        with self._lock:
+            sizes = list(self._batch_sizes)
+            latencies = sorted(seconds * 1000 for seconds in self._latencies)
+
+        return {
+            "batches": self.batches,
+            "failedBatches": self.failed_batches,
+            "orders": self.orders,
+            "queued": self._queue.qsize(),
+            "batchSizeAvg": statistics.mean(sizes) if sizes else 0.0,
+            "batchSizeMax": max(sizes) if sizes else 0,
+            "latencyAvgMs": statistics.mean(latencies) if latencies else 0.0,
+            "latencyP50Ms": latencies[len(latencies) // 2] if latencies else 0.0,
+            "latencyP95Ms": latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+        }
@@ -0,0 +1,136 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.18;
+
+/**
+ * @title OrderPaymentClone
+ * @dev Initialize-once variant of OrderPayment used as the implementation behind EIP-1167 clones.
+ * Clones share this contract's code, so every order costs a 45 byte proxy instead of a full deployment.
+ * Payment, courier assignment and delivery confirmation behave exactly like OrderPayment.
+ */
+
+contract OrderPaymentClone {
+    address payable public owner_address;
+    address payable public courier_address;
+    address public customer_address;
+
+    uint public order_price;
+    uint public amount_paid;           // Track total amount paid so far
+    bool public delivered;
+    bool public initialized;
+
+    // Events for tracking important state changes on the blockchain
+    event PaymentReceived(address indexed customer, uint amount, uint totalPaid);
+    event CourierAssigned(address indexed courier);
+    event DeliveryConfirmed(address indexed customer);
+    event FundsDistributed(address indexed owner, uint ownerAmount, address indexed courier, uint courierAmount);
+
+    constructor() {
+        initialized = true;                // The implementation itself can never be initialized
+    }
+
+    /**
+     * @dev Sets the order data of a fresh clone, replaces the constructor of OrderPayment
+     * Requirements:
+     * - Clone must not be initialized yet
+     * The factory creates and initializes a clone in the same transaction,
+     * so nobody else can initialize it first.
+     */
+    function initialize(
+        address payable _owner_address,
+        address payable _courier_address,
+        address _customer_address,
+        uint _order_price
+    ) external {
+        require(!initialized, "Already initialized!");
+
+        initialized = true;
+        owner_address = _owner_address;
+        courier_address = _courier_address;
+        customer_address = _customer_address;
+        order_price = _order_price;
+    }
+
+    /**
+     * @dev Allows the customer to pay for the order (full or partial payment)
+     * Requirements:
+     * - Caller must be the customer
+     * - Payment amount must not exceed remaining balance
+     * - Order must not already be delivered
+     */
+    function pay() external payable {
+        require(msg.sender == customer_address, "Only customer can pay!");
+        require(!delivered, "Order already delivered!");
+        require(amount_paid + msg.value <= order_price, "Payment exceeds order price!");
+        require(msg.value > 0, "Payment must be greater than zero!");
+
+        amount_paid += msg.value;
+        emit PaymentReceived(msg.sender, msg.value, amount_paid);
+    }
+
+    /**
+     * @dev Allows the owner to assign or reassign a courier to the order
+     * Requirements:
+     * - Caller must be the owner
+     * - Order must be FULLY paid first
+     * - Either no courier is assigned yet, or reassigning to the same courier
+     */
+    function assignCourier(address payable _courier_address) external {
+        require(msg.sender == owner_address, "Only owner can assign courier!");
+        require(isPaid(), "Order must be fully paid first!");
+        require(courier_address == address(0) || courier_address == _courier_address, "Courier already assigned!");
+
+        courier_address = _courier_address;
+        emit CourierAssigned(_courier_address);
+    }
+
+    /**
+     * @dev Allows the customer to confirm delivery, the payment is split 80% owner / 20% courier
+     * Requirements:
+     * - Caller must be the customer
+     * - Order must be fully paid
+     * - A courier must be assigned
+     * - Delivery must not already be confirmed
+     */
+    function confirmDelivery() external {
+        require(msg.sender == customer_address, "Only customer can confirm delivery!");
+        require(isPaid(), "Order must be fully paid!");
+        require(courier_address != address(0), "Courier must be assigned!");
+        require(!delivered, "Order already delivered!");
+
+        delivered = true;
+
+        uint owner_amount = (order_price * 80) / 100;
+        uint courier_amount = order_price - owner_amount;
+
+        owner_address.transfer(owner_amount);
+        courier_address.transfer(courier_amount);
+
+        emit DeliveryConfirmed(msg.sender);
+        emit FundsDistributed(owner_address, owner_amount, courier_address, courier_amount);
+    }
+
+    // View functions
+
+    function isPaid() public view returns (bool) {
+        return amount_paid >= order_price;
+    }
+
+    function isDelivered() external view returns (bool) {
+        return delivered;
+    }
+
+    function getContractBalance() external view returns (uint) {
+        return address(this).balance;
+    }
+
+    function getAmountPaid() external view returns (uint) {
+        return amount_paid;
+    }
+
+    function getRemainingAmount() external view returns (uint) {
+        if (amount_paid >= order_price) {
+            return 0;
+        }
+        return order_price - amount_paid;
+    }
+}
\ No newline at end of file
@@ -0,0 +1,84 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.18;
+
+interface IOrderPaymentClone {
+    function initialize(
+        address payable _owner_address,
+        address payable _courier_address,
+        address _customer_address,
+        uint _order_price
+    ) external;
+}
+
+/**
+ * @title OrderPaymentFactory
+ * @dev Creates one EIP-1167 minimal proxy of a deployed OrderPaymentClone implementation per order.
+ */
+contract OrderPaymentFactory {
+    // Largest number of orders of one createOrders call
+    uint public constant MAX_BATCH_SIZE = 256;
+
+    address public immutable implementation;
+    address payable public immutable owner;
+
+    event OrderCreated(address indexed order, address indexed customer, uint price);
+
+    constructor(address _implementation) {
+        owner = payable(msg.sender);
+        implementation = _implementation;
+    }
+
+    /**
+     * @dev Creates and initializes the payment contract of one order
+     * Requirements:
+     * - Caller must be the owner
+     * @return order Address of the new clone
+     */
+    function createOrder(address _customer_address, uint _order_price) external returns (address order) {
+        require(msg.sender == owner, "Only owner can create orders!");
+
+        order = _createOrder(_customer_address, _order_price);
+    }
+
+    /**
+     * @dev Creates the payment contracts of several orders in one transaction
+     * OrderCreated events are emitted in the order of the arguments
+     * Requirements:
+     * - Caller must be the owner
+     * - Both arrays must have the same length
+     * - At most MAX_BATCH_SIZE orders
+     * @return orders Addresses of the new clones
+     */
+    function createOrders(address[] calldata _customer_addresses, uint[] calldata _order_prices) external returns (address[] memory orders) {
+        require(msg.sender == owner, "Only owner can create orders!");
+        require(_customer_addresses.length == _order_prices.length, "Length mismatch!");
+        require(_customer_addresses.length <= MAX_BATCH_SIZE, "Batch too large!");
+
+        orders = new address[](_customer_addresses.length);
+        for (uint i = 0; i < _customer_addresses.length; i++) {
+            orders[i] = _createOrder(_customer_addresses[i], _order_prices[i]);
+        }
+    }
+
+    function _createOrder(address _customer_address, uint _order_price) internal returns (address order) {
+        order = _clone(implementation);
+        IOrderPaymentClone(order).initialize(owner, payable(address(0)), _customer_address, _order_price);
+
+        emit OrderCreated(order, _customer_address, _order_price);
+    }
+
+    /**
+     * @dev EIP-1167 minimal proxy creation, delegates every call to target
+     */
+    function _clone(address target) internal returns (address result) {
+        bytes20 target_bytes = bytes20(target);
+        assembly {
+            let clone_code := mload(0x40)
+            mstore(clone_code, 0x3d602d80600a3d3981f3363d3d373d3d3d363d73000000000000000000000000)
+            mstore(add(clone_code, 0x14), target_bytes)
+            mstore(add(clone_code, 0x28), 0x5af43d82803e903d91602b57fd5bf30000000000000000000000000000000000)
+            result := create(0, clone_code, 0x37)
+        }
+        require(result != address(0), "Clone creation failed!");
+    }
+}
\ No newline at end of file
@@ -0,0 +1,180 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.18;
+
+/**
+ * @title OrderRegistry
+ * @dev One escrow contract holding every order in a mapping keyed by the order id of the database.
+ * Creating an order is a storage write instead of a contract deployment.
+ * Payment, courier assignment and delivery confirmation behave exactly like OrderPayment,
+ * every function and event just takes the order id as an extra first argument.
+ */
+
+contract OrderRegistry {
+    struct Order {
+        address payable courier_address;
+        address customer_address;
+        uint order_price;
+        uint amount_paid;              // Track total amount paid so far
+        bool delivered;
+        bool exists;
+    }
+
+    // Largest number of orders of one createOrders call
+    uint public constant MAX_BATCH_SIZE = 256;
+
+    address payable public owner_address;
+
+    mapping(uint => Order) public orders;
+
+    // Events for tracking important state changes on the blockchain
+    event OrderCreated(uint indexed orderId, address indexed customer, uint price);
+    event PaymentReceived(uint indexed orderId, address indexed customer, uint amount, uint totalPaid);
+    event CourierAssigned(uint indexed orderId, address indexed courier);
+    event DeliveryConfirmed(uint indexed orderId, address indexed customer);
+    event FundsDistributed(uint indexed orderId, address indexed owner, uint ownerAmount, address indexed courier, uint courierAmount);
+
+    constructor() {
+        owner_address = payable(msg.sender);
+    }
+
+    modifier existing(uint orderId) {
+        require(orders[orderId].exists, "Unknown order!");
+        _;
+    }
+
+    /**
+     * @dev Registers a new order, replaces the constructor of OrderPayment
+     * Requirements:
+     * - Caller must be the owner
+     * - Order id must not be used yet
+     */
+    function createOrder(uint orderId, address customer, uint price) external {
+        require(msg.sender == owner_address, "Only owner can create orders!");
+
+        _createOrder(orderId, customer, price);
+    }
+
+    /**
+     * @dev Registers several orders in one transaction
+     * Requirements:
+     * - Caller must be the owner
+     * - All arrays must have the same length
+     * - At most MAX_BATCH_SIZE orders
+     * - No order id may be used yet
+     */
+    function createOrders(uint[] calldata orderIds, address[] calldata customers, uint[] calldata prices) external {
+        require(msg.sender == owner_address, "Only owner can create orders!");
+        require(orderIds.length == customers.length && orderIds.length == prices.length, "Length mismatch!");
+        require(orderIds.length <= MAX_BATCH_SIZE, "Batch too large!");
+
+        for (uint i = 0; i < orderIds.length; i++) {
+            _createOrder(orderIds[i], customers[i], prices[i]);
+        }
+    }
+
+    function _createOrder(uint orderId, address customer, uint price) internal {
+        require(!orders[orderId].exists, "Order already exists!");
+
+        Order storage order = orders[orderId];
+        order.customer_address = customer;
+        order.order_price = price;
+        order.exists = true;
+
+        emit OrderCreated(orderId, customer, price);
+    }
+
+    /**
+     * @dev Allows the customer to pay for the order (full or partial payment)
+     * The funds are held in escrow by the registry until delivery is confirmed
+     * Requirements:
+     * - Caller must be the customer
+     * - Payment amount must not exceed remaining balance
+     * - Order must not already be delivered
+     */
+    function pay(uint orderId) external payable existing(orderId) {
+        Order storage order = orders[orderId];
+
+        require(msg.sender == order.customer_address, "Only customer can pay!");
+        require(!order.delivered, "Order already delivered!");
+        require(order.amount_paid + msg.value <= order.order_price, "Payment exceeds order price!");
+        require(msg.value > 0, "Payment must be greater than zero!");
+
+        order.amount_paid += msg.value;
+        emit PaymentReceived(orderId, msg.sender, msg.value, order.amount_paid);
+    }
+
+    /**
+     * @dev Allows the owner to assign or reassign a courier to the order
+     * Requirements:
+     * - Caller must be the owner
+     * - Order must be FULLY paid first
+     * - Either no courier is assigned yet, or reassigning to the same courier
+     */
+    function assignCourier(uint orderId, address payable _courier_address) external existing(orderId) {
+        Order storage order = orders[orderId];
+
+        require(msg.sender == owner_address, "Only owner can assign courier!");
+        require(isPaid(orderId), "Order must be fully paid first!");
+        require(order.courier_address == address(0) || order.courier_address == _courier_address, "Courier already assigned!");
+
+        order.courier_address = _courier_address;
+        emit CourierAssigned(orderId, _courier_address);
+    }
+
+    /**
+     * @dev Allows the customer to confirm delivery, releasing the order's funds from escrow
+     * The payment is split: 80% to owner, 20% to courier
+     * Requirements:
+     * - Caller must be the customer
+     * - Order must be fully paid
+     * - A courier must be assigned
+     * - Delivery must not already be confirmed
+     */
+    function confirmDelivery(uint orderId) external existing(orderId) {
+        Order storage order = orders[orderId];
+
+        require(msg.sender == order.customer_address, "Only customer can confirm delivery!");
+        require(isPaid(orderId), "Order must be fully paid!");
+        require(order.courier_address != address(0), "Courier must be assigned!");
+        require(!order.delivered, "Order already delivered!");
+
+        order.delivered = true;
+
+        // Calculate payment split: 80% to owner, 20% to courier
+        uint owner_amount = (order.order_price * 80) / 100;
+        uint courier_amount = order.order_price - owner_amount;
+
+        // Transfer funds from the registry to respective parties
+        owner_address.transfer(owner_amount);
+        order.courier_address.transfer(courier_amount);
+
+        emit DeliveryConfirmed(orderId, msg.sender);
+        emit FundsDistributed(orderId, owner_address, owner_amount, order.courier_address, courier_amount);
+    }
+
+    // View functions (read-only, don't modify state, no gas cost when called externally)
+
+    function isPaid(uint orderId) public view existing(orderId) returns (bool) {
+        return orders[orderId].amount_paid >= orders[orderId].order_price;
+    }
+
+    function isDelivered(uint orderId) external view existing(orderId) returns (bool) {
+        return orders[orderId].delivered;
+    }
+
+    function getAmountPaid(uint orderId) external view existing(orderId) returns (uint) {
+        return orders[orderId].amount_paid;
+    }
+
+    function getCourierAddress(uint orderId) external view existing(orderId) returns (address) {
+        return orders[orderId].courier_address;
+    }
+
+    function getRemainingAmount(uint orderId) external view existing(orderId) returns (uint) {
+        Order storage order = orders[orderId];
+        if (order.amount_paid >= order.order_price) {
+            return 0;
+        }
+        return order.order_price - order.amount_paid;
+    }
+}
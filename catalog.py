@@ -0,0 +1,179 @@
+import threading
+import time
+
+from sqlalchemy import func
+
+from configuration import CATALOG_CHANGE_RETENTION, SEARCH_BACKEND
+from models import database, CatalogVersion, CatalogChange, Product, Category, ProductCategory
+
+# catalog_version table holds a single row
+CATALOG_VERSION_ID = 1
+
+
+def get_catalog_version():
+    """
+    Get current catalog version.
+    The version lives in the database so every worker process sees the same value.
+    """
+    version = database.session.query(
+        CatalogVersion.version
+    ).filter(
+        CatalogVersion.id == CATALOG_VERSION_ID
+    ).scalar()
+
+    return version or 0
+
+
+def bump_catalog_version():
+    """
+    Increment catalog version inside the current transaction and return the new version.
+    Must be called by every request that changes products or categories.
+    """
+    updated = database.session.query(CatalogVersion).filter(
+        CatalogVersion.id == CATALOG_VERSION_ID
+    ).update(
+        {CatalogVersion.version: CatalogVersion.version + 1},
+        synchronize_session=False
+    )
+
+    if not updated:
+        database.session.add(CatalogVersion(id=CATALOG_VERSION_ID, version=1))
+        return 1
+
+    # the row stays locked by the update until commit
+    return get_catalog_version()
+
+
+def record_catalog_changes(version, product_ids, category_ids):
+    """
+    Append products and categories changed by version to the change log,
+    and drop the changes of versions older than the last CATALOG_CHANGE_RETENTION.
+    """
+    changes = [
+        {"version": version, "entity": "product", "entity_id": product_id}
+        for product_id in sorted(set(product_ids))
+    ] + [
+        {"version": version, "entity": "category", "entity_id": category_id}
+        for category_id in sorted(set(category_ids))
+    ]
+
+    if changes:
+        database.session.execute(CatalogChange.__table__.insert(), changes)
+
+    # get_catalog_changes answers with a full snapshot for versions no longer covered
+    database.session.query(CatalogChange).filter(
+        CatalogChange.version <= version - CATALOG_CHANGE_RETENTION
+    ).delete(synchronize_session=False)
+
+
+def get_catalog_changes(since):
+    """
+    Get (product ids, category ids) changed after version since,
+    or None when the change log does not reach back to since.
+    """
+    oldest = database.session.query(func.min(CatalogChange.version)).scalar()
+    if oldest is None or since + 1 < oldest:
+        return None
+
+    changes = database.session.query(
+        CatalogChange.entity, CatalogChange.entity_id
+    ).filter(
+        CatalogChange.version > since
+    ).all()
+
+    product_ids = {entity_id for entity, entity_id in changes if entity == "product"}
+    category_ids = {entity_id for entity, entity_id in changes if entity == "category"}
+    return product_ids, category_ids
+
+
+class CatalogSnapshot:
+    """
+    In-memory copy of the catalog at one version.
+    Products are (id, name, price) tuples sorted by id, held as a ColumnarCatalog with the columnar
+    search backend. Categories map category name to product ids.
+    Search indexes are built on first use and live as long as the snapshot.
+    """
+
+    def __init__(self, version, products, categories):
+        self.version = version
+        self.products = products
+        self.categories = categories
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def index(self, name, factory):
+        """Get index by name, building it with factory(snapshot) the first time"""
+        index = self._indexes.get(name)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(name)
+                if index is None:
+                    index = factory(self)
+                    self._indexes[name] = index
+        return index
+
+
+def load_catalog_snapshot(version):
+    """Load all products and categories with three queries"""
+    products = database.session.query(
+        Product.id, Product.name, Product.price
+    ).order_by(Product.id).all()
+
+    category_names = dict(database.session.query(Category.id, Category.name).all())
+    categories = {name: [] for name in category_names.values()}
+
+    links = database.session.query(
+        ProductCategory.category_id, ProductCategory.product_id
+    ).order_by(ProductCategory.product_id).all()
+
+    for category_id, product_id in links:
+        categories[category_names[category_id]].append(product_id)
+
+    if SEARCH_BACKEND == "columnar":
+        # arrays instead of one tuple per product, imported here so the owner service needs no NumPy
+        from columnar import ColumnarCatalog
+        return CatalogSnapshot(version, ColumnarCatalog(products), categories)
+
+    return CatalogSnapshot(version, [tuple(product) for product in products], categories)
+
+
+def build_product_categories(snapshot):
+    """Build product id -> category names mapping for a catalog snapshot"""
+    product_categories = {product_id: [] for product_id, _, _ in snapshot.products}
+    for category_name, product_ids in snapshot.categories.items():
+        for product_id in product_ids:
+            product_categories[product_id].append(category_name)
+    return product_categories
+
+
+_snapshot = None
+_snapshot_checked_at = 0.0
+_snapshot_lock = threading.Lock()
+
+
+def get_catalog_snapshot(max_age=0.0, version=None):
+    """
+    Get snapshot of the current catalog for this process.
+    The catalog version is re-read from the database at most every max_age seconds,
+    the snapshot is reloaded only when the version changed.
+    Callers that already know the current version can pass it to skip the version query.
+    """
+    global _snapshot, _snapshot_checked_at
+
+    snapshot = _snapshot
+    if version is None:
+        if snapshot is not None and time.monotonic() - _snapshot_checked_at < max_age:
+            return snapshot
+
+        version = get_catalog_version()
+
+    if snapshot is not None and snapshot.version >= version:
+        _snapshot_checked_at = time.monotonic()
+        return snapshot
+
+    with _snapshot_lock:
+        # another thread may have reloaded it while we waited
+        if _snapshot is None or _snapshot.version < version:
+            _snapshot = load_catalog_snapshot(version)
+        _snapshot_checked_at = time.monotonic()
+        return _snapshot
@@ -0,0 +1,46 @@
+from pyroaring import BitMap
+
+
+class CategoryIndex:
+    """Category name -> compressed bitmap of product ids"""
+
+    def __init__(self, categories):
+        self.bitmaps = {name: BitMap(product_ids) for name, product_ids in categories.items()}
+        self.lower_names = [(name.lower(), name) for name in sorted(self.bitmaps)]
+
+    def matching_names(self, pattern):
+        """Get category names containing pattern, case insensitive like LIKE '%pattern%'"""
+        pattern = pattern.lower()
+        return [name for lower_name, name in self.lower_names if pattern in lower_name]
+
+    def select(self, patterns, match_all=False):
+        """
+        Get (product ids, matching category names) for a list of category patterns.
+        Each pattern selects the union of its matching categories,
+        the patterns are then intersected (match_all) or unioned.
+        """
+        selected = None
+        names = set()
+
+        for pattern in patterns:
+            pattern_names = self.matching_names(pattern)
+            names.update(pattern_names)
+
+            # union always returns a new bitmap, the indexed ones are never modified
+            pattern_products = BitMap()
+            if pattern_names:
+                pattern_products = BitMap.union(*(self.bitmaps[name] for name in pattern_names))
+
+            if selected is None:
+                selected = pattern_products
+            elif match_all:
+                selected &= pattern_products
+            else:
+                selected |= pattern_products
+
+        return (selected if selected is not None else BitMap()), names
+
+
+def build_category_index(snapshot):
+    """Build category bitmap index for a catalog snapshot"""
+    return CategoryIndex(snapshot.categories)
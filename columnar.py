@@ -0,0 +1,120 @@
+import math
+import re
+from decimal import Decimal
+
+import numpy as np
+from pyroaring import BitMap
+
+# Separates names inside the name blobs, cannot appear in a product name read from CSV lines
+NAME_SEPARATOR = "\n"
+
+
+class ColumnarCatalog:
+    """
+    Column oriented copy of the product table.
+    Ids and prices (in cents) are NumPy arrays, names are stored as one string blob
+    with an array of start offsets, so a product costs a few dozen bytes instead of an ORM instance.
+    Rows are ordered by product id.
+    """
+
+    def __init__(self, products):
+        self.ids = np.fromiter((product_id for product_id, _, _ in products), dtype=np.int64, count=len(products))
+        self.prices = np.fromiter((int(price * 100) for _, _, price in products), dtype=np.int64, count=len(products))
+
+        names = [name for _, name, _ in products]
+        self.names, self.name_offsets = self._blob(names)
+        self.lower_names, self.lower_name_offsets = self._blob([name.lower() for name in names])
+
+        # position of every row when ordered by name, ties broken by id
+        order = sorted(range(len(names)), key=lambda row: (names[row].lower(), row))
+        self.name_ranks = np.empty(len(names), dtype=np.int64)
+        self.name_ranks[order] = np.arange(len(names), dtype=np.int64)
+
+    @staticmethod
+    def _blob(names):
+        """Join names into one string, returns (blob, start offsets with a trailing end offset)"""
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        if names:
+            offsets[1:] = np.cumsum([len(name) + len(NAME_SEPARATOR) for name in names])
+        return NAME_SEPARATOR.join(names) + NAME_SEPARATOR, offsets
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        return int(self.ids[row]), self.name(row), Decimal(int(self.prices[row])).scaleb(-2)
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self)))
+
+    def name(self, row):
+        """Get display name of row"""
+        start, end = int(self.name_offsets[row]), int(self.name_offsets[row + 1]) - len(NAME_SEPARATOR)
+        return self.names[start:end]
+
+    def name_mask(self, pattern):
+        """Get mask of rows whose name contains pattern, case insensitive (% and _ are not wildcards)"""
+        if not pattern:
+            return np.ones(len(self), dtype=bool)
+
+        mask = np.zeros(len(self), dtype=bool)
+
+        pattern = pattern.lower()
+        if NAME_SEPARATOR in pattern:
+            return mask
+
+        # every hit in the blob at once, mapped to its row with a single searchsorted
+        hits = np.fromiter(
+            (match.start() for match in re.finditer(re.escape(pattern), self.lower_names)),
+            dtype=np.int64
+        )
+        mask[np.searchsorted(self.lower_name_offsets, hits, side="right") - 1] = True
+
+        return mask
+
+    def price_mask(self, min_price, max_price):
+        """Get mask of rows with price in [min_price, max_price], bounds are Decimals or None"""
+        mask = np.ones(len(self), dtype=bool)
+
+        if min_price is not None:
+            mask &= self.prices >= math.ceil(min_price * 100)
+
+        if max_price is not None:
+            mask &= self.prices <= math.floor(max_price * 100)
+
+        return mask
+
+    def id_mask(self, product_ids):
+        """Get mask of rows whose id is in the product id bitmap"""
+        mask = np.zeros(len(self), dtype=bool)
+
+        ids = np.frombuffer(product_ids.to_array(), dtype=np.uint32).astype(np.int64)
+        rows = np.searchsorted(self.ids, ids)
+
+        valid = rows < len(self)
+        rows, ids = rows[valid], ids[valid]
+        mask[rows[self.ids[rows] == ids]] = True
+
+        return mask
+
+    def ordered_rows(self, mask, sort):
+        """Get rows selected by mask, ordered by 'id', 'price' or 'name'"""
+        rows = np.flatnonzero(mask)
+
+        if sort == "price":
+            rows = rows[np.lexsort((self.ids[rows], self.prices[rows]))]
+        elif sort == "name":
+            rows = rows[np.argsort(self.name_ranks[rows], kind="stable")]
+
+        return rows
+
+    def id_bitmap(self, rows):
+        """Get bitmap of product ids of rows"""
+        return BitMap(self.ids[rows].tolist())
+
+
+def build_columnar_catalog(snapshot):
+    """Get columnar catalog of a catalog snapshot, snapshots loaded for the columnar backend already hold one"""
+    if isinstance(snapshot.products, ColumnarCatalog):
+        return snapshot.products
+    return ColumnarCatalog(snapshot.products)
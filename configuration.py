@@ -6,6 +6,104 @@ DATABASE_PASSWORD = os.environ.get("DATABASE_PASSWORD", "root")
 DATABASE_URL = os.environ.get("DATABASE_URL", "localhost")
 DATABASE_NAME = os.environ.get("DATABASE_NAME", "store_database")
 BLOCKCHAIN_URL = os.environ.get("BLOCKCHAIN_URL", "http://127.0.0.1:8545")
+# Keep-alive connections to the node per process, and seconds to connect / wait for an RPC response
+BLOCKCHAIN_POOL_SIZE = int(os.environ.get("BLOCKCHAIN_POOL_SIZE", "20"))
+BLOCKCHAIN_CONNECT_TIMEOUT = float(os.environ.get("BLOCKCHAIN_CONNECT_TIMEOUT", "5"))
+BLOCKCHAIN_TIMEOUT = float(os.environ.get("BLOCKCHAIN_TIMEOUT", "30"))
+
+# Number of serialized /search responses kept per worker process
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", "1024"))
+
+# "columnar" evaluates /search on the in-memory catalog snapshot, "database" runs SQL queries
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "columnar")
+
+# Seconds an in-memory catalog snapshot is served before the catalog version is checked again
+CATALOG_POLL_INTERVAL = float(os.environ.get("CATALOG_POLL_INTERVAL", "1.0"))
+
+# Catalog versions kept in the change log of /catalog_sync, clients behind them get a full snapshot
+CATALOG_CHANGE_RETENTION = int(os.environ.get("CATALOG_CHANGE_RETENTION", "1000"))
+
+# Largest edit distance accepted by fuzzy product search
+FUZZY_MAX_DISTANCE = int(os.environ.get("FUZZY_MAX_DISTANCE", "2"))
+
+# "sync" deploys the order contract inside /order, "async" commits the order
+# and leaves the deployment to a background deployer. /order_bulk always uses the deployer
+CONTRACT_DEPLOYMENT = os.environ.get("CONTRACT_DEPLOYMENT", "sync")
+DEPLOYER_POLL_INTERVAL = float(os.environ.get("DEPLOYER_POLL_INTERVAL", "2.0"))
+DEPLOYER_MAX_ATTEMPTS = int(os.environ.get("DEPLOYER_MAX_ATTEMPTS", "5"))
+
+# "deploy" deploys a full OrderPayment contract per order,
+# "clone" creates an EIP-1167 clone through the OrderPaymentFactory at ORDER_FACTORY_ADDRESS,
+# "registry" registers the order in the single OrderRegistry at ORDER_REGISTRY_ADDRESS,
+# "pool" initializes a pre-deployed OrderPaymentPooled contract
+CONTRACT_MODE = os.environ.get("CONTRACT_MODE", "deploy")
+ORDER_FACTORY_ADDRESS = os.environ.get("ORDER_FACTORY_ADDRESS", "")
+ORDER_REGISTRY_ADDRESS = os.environ.get("ORDER_REGISTRY_ADDRESS", "")
+
+# Pool of pre-deployed contracts for CONTRACT_MODE=pool, it holds about the orders of the last
+# POOL_RATE_WINDOW seconds, at least POOL_MIN_SIZE and at most POOL_MAX_SIZE contracts
+POOL_MIN_SIZE = int(os.environ.get("POOL_MIN_SIZE", "2"))
+POOL_MAX_SIZE = int(os.environ.get("POOL_MAX_SIZE", "50"))
+POOL_RATE_WINDOW = float(os.environ.get("POOL_RATE_WINDOW", "60"))
+POOL_POLL_INTERVAL = float(os.environ.get("POOL_POLL_INTERVAL", "5"))
+
+# Seconds new order contracts are collected and created by one transaction, 0 disables batching.
+# Batches need CONTRACT_MODE clone or registry, ORDER_BATCH_SIZE caps the orders per transaction.
+# A synchronous /order gives up on its batch after ORDER_BATCH_TIMEOUT seconds
+ORDER_BATCH_WINDOW = float(os.environ.get("ORDER_BATCH_WINDOW", "0"))
+# Larger batches revert, createOrders of OrderPaymentFactory and OrderRegistry take at most MAX_BATCH_SIZE orders
+MAX_ORDER_BATCH_SIZE = 256
+ORDER_BATCH_SIZE = min(max(int(os.environ.get("ORDER_BATCH_SIZE", "20")), 1), MAX_ORDER_BATCH_SIZE)
+ORDER_BATCH_TIMEOUT = float(os.environ.get("ORDER_BATCH_TIMEOUT", "180"))
+
+# Largest number of orders accepted by one /order_bulk request
+BULK_ORDER_LIMIT = int(os.environ.get("BULK_ORDER_LIMIT", "500"))
+
+# Seconds an /order Idempotency-Key remembers its order, and how long a request may hold it in progress
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", "86400"))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get("IDEMPOTENCY_LOCK_TIMEOUT", "300"))
+
+# "auto" uses EIP-1559 fees from eth_feeHistory when the node supports them, else "legacy" gas price.
+# Fees are refreshed every GAS_ORACLE_INTERVAL seconds and never used older than GAS_ORACLE_MAX_AGE,
+# retried transactions raise their fees by GAS_FEE_BUMP_PERCENT per attempt
+GAS_FEE_MODE = os.environ.get("GAS_FEE_MODE", "auto")
+GAS_ORACLE_INTERVAL = float(os.environ.get("GAS_ORACLE_INTERVAL", "5"))
+GAS_ORACLE_MAX_AGE = float(os.environ.get("GAS_ORACLE_MAX_AGE", "30"))
+GAS_FEE_BUMP_PERCENT = int(os.environ.get("GAS_FEE_BUMP_PERCENT", "12"))
+# Gas limits are node estimates plus GAS_LIMIT_MARGIN_PERCENT, re-estimated every GAS_ESTIMATE_TTL seconds
+GAS_LIMIT_MARGIN_PERCENT = int(os.environ.get("GAS_LIMIT_MARGIN_PERCENT", "20"))
+GAS_ESTIMATE_TTL = float(os.environ.get("GAS_ESTIMATE_TTL", "3600"))
+
+# Owner hot wallet keystore, decrypted once per process
+OWNER_KEYSTORE = os.environ.get("OWNER_KEYSTORE", "owner_account.json")
+OWNER_KEYSTORE_PASSWORD = os.environ.get("OWNER_KEYSTORE_PASSWORD", "iepblockchain")
+# Seconds between owner balance checks, ether balance that triggers a top-up and ether sent per top-up
+TREASURY_INTERVAL = float(os.environ.get("TREASURY_INTERVAL", "30"))
+TREASURY_MIN_BALANCE = float(os.environ.get("TREASURY_MIN_BALANCE", "1"))
+TREASURY_TOP_UP = float(os.environ.get("TREASURY_TOP_UP", "10"))
+
+# Contract objects (per contract and address) kept per process
+CONTRACT_CACHE_SIZE = int(os.environ.get("CONTRACT_CACHE_SIZE", "1024"))
+
+# Checksum form of recently validated addresses kept per process
+ADDRESS_CACHE_SIZE = int(os.environ.get("ADDRESS_CACHE_SIZE", "4096"))
+
+# "database" shares owner nonces between all processes and replicas, "local" keeps them per process
+NONCE_BACKEND = os.environ.get("NONCE_BACKEND", "database")
+# Seconds a handed out nonce may stay unsent, and a sent one unmined, before it is handed out again
+NONCE_LEASE_TIMEOUT = float(os.environ.get("NONCE_LEASE_TIMEOUT", "30"))
+NONCE_DROP_TIMEOUT = float(os.environ.get("NONCE_DROP_TIMEOUT", "300"))
+
+# "sync" waits for the receipt of /pick_up_order's transaction, "async" answers with the transaction hash
+# once it is sent and updates the order when the receipt tracker sees it mined
+TRANSACTION_CONFIRMATION = os.environ.get("TRANSACTION_CONFIRMATION", "sync")
+# Receipts of pending transactions are polled every RECEIPT_POLL_INTERVAL seconds, RECEIPT_BATCH_SIZE per request,
+# transactions without receipt after RECEIPT_TIMEOUT seconds are dropped.
+# States of the last RECEIPT_HISTORY_SIZE finished transactions are kept for status lookups
+RECEIPT_POLL_INTERVAL = float(os.environ.get("RECEIPT_POLL_INTERVAL", "0.5"))
+RECEIPT_BATCH_SIZE = int(os.environ.get("RECEIPT_BATCH_SIZE", "100"))
+RECEIPT_TIMEOUT = float(os.environ.get("RECEIPT_TIMEOUT", "120"))
+RECEIPT_HISTORY_SIZE = int(os.environ.get("RECEIPT_HISTORY_SIZE", "4096"))
 
 # JWT Configuration - MUST be the same across all services
 JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "JWT_SECRET_DEV_KEY")
@@ -0,0 +1,445 @@
+from addresses import to_checksum_address
+from artifacts import contract_artifacts
+from configuration import CONTRACT_MODE, ORDER_FACTORY_ADDRESS, ORDER_REGISTRY_ADDRESS
+from gas import gas_oracle, gas_estimator
+from nonces import owner_nonces
+from pool import add_pooled_contract, claim_pooled_contract, release_pooled_contract, mark_pooled_contract_failed
+from utilities import get_web3
+from wallet import get_owner_account
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Compiled contract that holds the orders of each CONTRACT_MODE
+ORDER_CONTRACT_NAMES = {
+    "deploy": "OrderPayment",
+    "clone": "OrderPaymentClone",
+    "registry": "OrderRegistry",
+    "pool": "OrderPaymentPooled"
+}
+
+
+def order_contract_name():
+    """Name of the compiled contract that deploy_order_contract(s) creates orders with"""
+    return ORDER_CONTRACT_NAMES.get(CONTRACT_MODE, "OrderPayment")
+
+
+def load_contract_artifacts(name):
+    """Get (abi, bytecode) of a compiled contract from the process-wide artifact store"""
+    artifact = contract_artifacts.get(name)
+    return artifact.abi, artifact.bytecode
+
+
+def estimate_gas(contract_name, call, transaction, default, variant=None):
+    """
+    Gas limit of a contract function call or constructor from the estimation cache,
+    keyed by the contract's bytecode hash, the function and an optional variant (e.g. batch size).
+    Falls back to default when the node cannot estimate the call.
+    """
+    key = (contract_artifacts.get(contract_name).bytecode_hash, getattr(call, "fn_name", "constructor"), variant)
+    return gas_estimator.gas_limit(key, lambda: call.estimate_gas(transaction), default)
+
+
+def deploy_order_contract(order_id, customer_address, price):
+    """
+    Create payment contract of an order and wait until it is mined.
+    Depending on CONTRACT_MODE this is a full OrderPayment deployment, a factory clone,
+    a new entry of the OrderRegistry or the initialization of a pre-deployed pooled contract.
+    Returns the contract address, for registry orders the registry address.
+    """
+    if CONTRACT_MODE == "registry":
+        registry, receipt = send_order_registration(order_id, customer_address, price, ORDER_REGISTRY_ADDRESS)
+
+        if not registry.events.OrderCreated().process_receipt(receipt):
+            raise Exception("Order was not registered")
+
+        return registry.address
+
+    if CONTRACT_MODE == "pool":
+        address = claimed = claim_pooled_contract()
+        if address is None:
+            # pool ran dry, deploy one inline
+            address = send_pooled_deployment()['contractAddress']
+
+        try:
+            send_pooled_initialization(address, customer_address, price)
+        except Exception:
+            recover_pooled_contract(address, claimed is not None)
+            raise
+
+        return address
+
+    if CONTRACT_MODE == "clone":
+        factory, receipt = send_order_clone(customer_address, price, ORDER_FACTORY_ADDRESS)
+
+        events = factory.events.OrderCreated().process_receipt(receipt)
+        if not events:
+            raise Exception("Order clone was not created")
+
+        return events[0]['args']['order']
+
+    receipt = send_order_deployment(customer_address, price)
+
+    # Get contract address
+    return receipt['contractAddress']
+
+
+def deploy_order_contracts(orders):
+    """
+    Create payment contracts of several orders, orders are (order id, customer address, price) tuples.
+    In clone and registry mode all orders are created by one transaction, a full deployment
+    cannot be batched and creates them one by one.
+    Returns the contract addresses in the order of orders.
+    """
+    if CONTRACT_MODE == "registry":
+        registry, receipt = send_order_batch_registration(orders, ORDER_REGISTRY_ADDRESS)
+
+        if len(registry.events.OrderCreated().process_receipt(receipt)) != len(orders):
+            raise Exception("Orders were not registered")
+
+        return [registry.address] * len(orders)
+
+    if CONTRACT_MODE == "clone":
+        factory, receipt = send_order_batch_clone(orders, ORDER_FACTORY_ADDRESS)
+
+        # events are emitted in the order the clones were created
+        events = factory.events.OrderCreated().process_receipt(receipt)
+        if len(events) != len(orders):
+            raise Exception("Order clones were not created")
+
+        return [event['args']['order'] for event in events]
+
+    return [deploy_order_contract(*order) for order in orders]
+
+
+def send_order_deployment(customer_address, price):
+    """Deploy a full OrderPayment contract for an order, returns the receipt"""
+
+    # Load contract ABI and bytecode
+    abi, bytecode = load_contract_artifacts("OrderPayment")
+
+    # Get owner account
+    owner_address, owner_private_key = get_owner_account()
+
+    web3 = get_web3()
+
+    # Create contract instance
+    Contract = web3.eth.contract(abi=abi, bytecode=bytecode)
+
+    # Calculate order price in wei
+    order_price_wei = int(price * 100)
+
+    # Constructor for transaction
+    # Courier address is 0x0 at the start we will assign it later
+    zero_address = web3.to_checksum_address(ZERO_ADDRESS)
+
+    # Pass arguments as separate parameters, NOT as a dictionary
+    constructor = Contract.constructor(
+        owner_address,
+        zero_address,  # No courier assigned yet
+        customer_address,
+        order_price_wei
+    )
+
+    gas_limit = estimate_gas("OrderPayment", constructor, {'from': owner_address}, 2000000)
+
+    # Sign and send transaction, nonce comes from the owner nonce manager
+    return owner_nonces.send_transaction(
+        owner_address,
+        owner_private_key,
+        lambda nonce: constructor.build_transaction({
+            'from': owner_address,
+            'nonce': nonce,
+            'gas': gas_limit,
+            **gas_oracle.fees()
+        })
+    )
+
+
+def send_pooled_deployment():
+    """Deploy an uninitialized OrderPaymentPooled contract for the pool, returns the receipt"""
+    abi, bytecode = load_contract_artifacts("OrderPaymentPooled")
+
+    owner_address, owner_private_key = get_owner_account()
+
+    web3 = get_web3()
+    constructor = web3.eth.contract(abi=abi, bytecode=bytecode).constructor()
+    gas_limit = estimate_gas("OrderPaymentPooled", constructor, {'from': owner_address}, 2000000)
+
+    return owner_nonces.send_transaction(
+        owner_address,
+        owner_private_key,
+        lambda nonce: constructor.build_transaction({
+            'from': owner_address,
+            'nonce': nonce,
+            'gas': gas_limit,
+            **gas_oracle.fees()
+        })
+    )
+
+
+def send_pooled_initialization(address, customer_address, price):
+    """Bind a claimed OrderPaymentPooled contract to an order, returns the receipt"""
+    owner_address, owner_private_key = get_owner_account()
+
+    contract = contract_artifacts.contract("OrderPaymentPooled", address)
+
+    initialize_call = contract.functions.initialize(customer_address, int(price * 100))
+    gas_limit = estimate_gas("OrderPaymentPooled", initialize_call, {'from': owner_address}, 150000)
+
+    receipt = owner_nonces.send_transaction(
+        owner_address,
+        owner_private_key,
+        lambda nonce: initialize_call.build_transaction({
+            'from': owner_address,
+            'nonce': nonce,
+            'gas': gas_limit,
+            **gas_oracle.fees()
+        })
+    )
+
+    if not contract.events.Initialized().process_receipt(receipt):
+        raise Exception("Pooled contract was not initialized")
+
+    return receipt
+
+
+def recover_pooled_contract(address, claimed):
+    """
+    Handle a pooled contract whose initialization failed.
+    A contract that is still uninitialized goes (back) into the pool, a claimed one that was initialized
+    or cannot be checked is marked FAILED so it is never handed to another order.
+    """
+    try:
+        initialized = contract_artifacts.contract("OrderPaymentPooled", address).functions.initialized().call()
+    except Exception as e:
+        print(f"Warning: could not check pooled contract {address}: {str(e)}")
+        initialized = True
+
+    if not initialized:
+        if claimed:
+            release_pooled_contract(address)
+        else:
+            add_pooled_contract(address)
+    elif claimed:
+        mark_pooled_contract_failed(address)
+
+
+def send_order_clone(customer_address, price, factory_address):
+    """
+    Create an EIP-1167 clone of OrderPaymentClone through the OrderPaymentFactory at factory_address.
+    Returns (factory contract, receipt), the clone address is in the OrderCreated event.
+    """
+    if not factory_address:
+        raise Exception("ORDER_FACTORY_ADDRESS is not configured")
+
+    owner_address, owner_private_key = get_owner_account()
+
+    web3 = get_web3()
+    factory = contract_artifacts.contract("OrderPaymentFactory", web3.to_checksum_address(factory_address))
+
+    create_call = factory.functions.createOrder(customer_address, int(price * 100))
+    gas_limit = estimate_gas("OrderPaymentFactory", create_call, {'from': owner_address}, 300000)
+
+    receipt = owner_nonces.send_transaction(
+        owner_address,
+        owner_private_key,
+        lambda nonce: create_call.build_transaction({
+            'from': owner_address,
+            'nonce': nonce,
+            'gas': gas_limit,
+            **gas_oracle.fees()
+        })
+    )
+
+    return factory, receipt
+
+
+def send_order_registration(order_id, customer_address, price, registry_address):
+    """
+    Register an order in the OrderRegistry at registry_address under its database id.
+    Returns (registry contract, receipt).
+    """
+    if not registry_address:
+        raise Exception("ORDER_REGISTRY_ADDRESS is not configured")
+
+    owner_address, owner_private_key = get_owner_account()
+
+    web3 = get_web3()
+    registry = contract_artifacts.contract("OrderRegistry", web3.to_checksum_address(registry_address))
+
+    create_call = registry.functions.createOrder(order_id, customer_address, int(price * 100))
+    gas_limit = estimate_gas("OrderRegistry", create_call, {'from': owner_address}, 150000)
+
+    receipt = owner_nonces.send_transaction(
+        owner_address,
+        owner_private_key,
+        lambda nonce: create_call.build_transaction({
+            'from': owner_address,
+            'nonce': nonce,
+            'gas': gas_limit,
+            **gas_oracle.fees()
+        })
+    )
+
+    return registry, receipt
+
+
+def send_order_batch_clone(orders, factory_address):
+    """Create clones of several (order id, customer address, price) orders with one factory transaction"""
+    if not factory_address:
+        raise Exception("ORDER_FACTORY_ADDRESS is not configured")
+
+    owner_address, owner_private_key = get_owner_account()
+
+    web3 = get_web3()
+    factory = contract_artifacts.contract("OrderPaymentFactory", web3.to_checksum_address(factory_address))
+
+    create_call = factory.functions.createOrders(
+        [customer_address for _, customer_address, _ in orders],
+        [int(price * 100) for _, _, price in orders]
+    )
+    gas_limit = estimate_gas(
+        "OrderPaymentFactory", create_call, {'from': owner_address}, 100000 + 250000 * len(orders), len(orders)
+    )
+
+    receipt = owner_nonces.send_transaction(
+        owner_address,
+        owner_private_key,
+        lambda nonce: create_call.build_transaction({
+            'from': owner_address,
+            'nonce': nonce,
+            'gas': gas_limit,
+            **gas_oracle.fees()
+        })
+    )
+
+    return factory, receipt
+
+
+def send_order_batch_registration(orders, registry_address):
+    """Register several (order id, customer address, price) orders with one registry transaction"""
+    if not registry_address:
+        raise Exception("ORDER_REGISTRY_ADDRESS is not configured")
+
+    owner_address, owner_private_key = get_owner_account()
+
+    web3 = get_web3()
+    registry = contract_artifacts.contract("OrderRegistry", web3.to_checksum_address(registry_address))
+
+    create_call = registry.functions.createOrders(
+        [order_id for order_id, _, _ in orders],
+        [customer_address for _, customer_address, _ in orders],
+        [int(price * 100) for _, _, price in orders]
+    )
+    gas_limit = estimate_gas(
+        "OrderRegistry", create_call, {'from': owner_address}, 50000 + 100000 * len(orders), len(orders)
+    )
+
+    receipt = owner_nonces.send_transaction(
+        owner_address,
+        owner_private_key,
+        lambda nonce: create_call.build_transaction({
+            'from': owner_address,
+            'nonce': nonce,
+            'gas': gas_limit,
+            **gas_oracle.fees()
+        })
+    )
+
+    return registry, receipt
+
+
+def deploy_order_factory():
+    """
+    Deploy the OrderPaymentClone implementation and an OrderPaymentFactory cloning it
+    from the owner account, returns factory address
+    """
+    implementation_address = deploy_owner_contract("OrderPaymentClone", 2000000)
+    return deploy_owner_contract("OrderPaymentFactory", 1000000, implementation_address)
+
+
+def deploy_owner_contract(contract_name, default_gas, *arguments):
+    """Deploy a contract from the owner account with constructor arguments, returns its address"""
+    abi, bytecode = load_contract_artifacts(contract_name)
+
+    owner_address, owner_private_key = get_owner_account()
+
+    web3 = get_web3()
+    constructor = web3.eth.contract(abi=abi, bytecode=bytecode).constructor(*arguments)
+    gas_limit = estimate_gas(contract_name, constructor, {'from': owner_address}, default_gas)
+
+    receipt = owner_nonces.send_transaction(
+        owner_address,
+        owner_private_key,
+        lambda nonce: constructor.build_transaction({
+            'from': owner_address,
+            'nonce': nonce,
+            'gas': gas_limit,
+            **gas_oracle.fees()
+        })
+    )
+
+    return receipt['contractAddress']
+
+
+def deploy_order_registry():
+    """Deploy OrderRegistry from the owner account, returns registry address"""
+    return deploy_owner_contract("OrderRegistry", 2000000)
+
+
+def is_registry_address(address):
+    """Check if a stored contract address is the OrderRegistry rather than a per-order contract"""
+    return bool(ORDER_REGISTRY_ADDRESS) and address.lower() == ORDER_REGISTRY_ADDRESS.lower()
+
+
+class OrderContract:
+    """
+    Payment contract of one order with the same calls for every CONTRACT_MODE.
+    Per-order contracts (deploy, clone and pool) take no order id, the registry takes it as first argument.
+    Orders keep the mode they were created with, so switching modes does not break older orders.
+    contract_name is the compiled contract that created the order, its ABI and gas estimates are used.
+    Orders stored without it are told apart by the registry address.
+    """
+
+    def __init__(self, order_id, contract_address, contract_name=None):
+        if contract_name is None:
+            contract_name = "OrderRegistry" if is_registry_address(contract_address) else "OrderPayment"
+
+        self.registry = contract_name == "OrderRegistry"
+        self.order_id = order_id
+        self.name = contract_name
+
+        self.contract = contract_artifacts.contract(self.name, to_checksum_address(contract_address))
+
+    def _arguments(self, *arguments):
+        return (self.order_id, *arguments) if self.registry else arguments
+
+    def is_paid(self):
+        return self.contract.functions.isPaid(*self._arguments()).call()
+
+    def get_amount_paid(self):
+        return self.contract.functions.getAmountPaid(*self._arguments()).call()
+
+    def get_courier_address(self):
+        if self.registry:
+            return self.contract.functions.getCourierAddress(self.order_id).call()
+        return self.contract.functions.courier_address().call()
+
+    def pay(self):
+        """Contract function of a payment, build the transaction with the paid value"""
+        return self.contract.functions.pay(*self._arguments())
+
+    def assign_courier(self, courier_address):
+        return self.contract.functions.assignCourier(*self._arguments(courier_address))
+
+    def confirm_delivery(self):
+        return self.contract.functions.confirmDelivery(*self._arguments())
+
+    def estimate_gas(self, call, transaction, default=200000):
+        """Gas limit of one of the calls above, see estimate_gas"""
+        return estimate_gas(self.name, call, transaction, default)
+
+
+def get_order_contract(order):
+    """Get OrderContract of an order with a contract address"""
+    return OrderContract(order.id, order.contract_address, order.contract_name)
@@ -1,12 +1,20 @@
-import json
 import os
+import re
 
 from flask import Flask, jsonify, request
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt, get_jwt_identity
 
-from configuration import Configuration
+from addresses import is_valid_address, to_checksum_address
+from artifacts import contract_artifacts
+from configuration import Configuration, TRANSACTION_CONFIRMATION
+from contracts import get_order_contract
+from gas import gas_oracle
 from models import database, Order, User
-from utilities import get_web3, read_file, is_valid_address, get_owner_account, send_transaction
+from nonces import owner_nonces
+from receipts import receipt_tracker, FAILED, DROPPED
+from wallet import get_owner_account
+
+TRANSACTION_HASH = re.compile(r"^0x[0-9a-fA-F]{64}$")
 
 application = Flask(__name__)
 application.config.from_object(Configuration)
@@ -18,6 +26,12 @@ application.config.from_object(Configuration)
 jwt = JWTManager(application)
 database.init_app(application)
 
+# Compiled contracts are read once per process
+contract_artifacts.load_all()
+
+# Receipt callbacks confirm owner nonces and update orders through the database
+receipt_tracker.init_app(application)
+
 @application.route("/orders_to_deliver", methods=["GET"])
 @jwt_required()
 def orders_to_deliver():
@@ -99,6 +113,9 @@ def pick_up_order():
         return jsonify(message="Invalid order id."), 400
 
     # 2. Check for contract address
+    if order.contract_status == "PENDING":
+        return jsonify(message="Contract deployment pending."), 400
+
     if not order.contract_address:
         return jsonify(message="Invalid order id."), 400
 
@@ -113,32 +130,50 @@ def pick_up_order():
     if not is_valid_address(courier_address):
         return jsonify(message="Invalid address."), 400
 
-    web3 = get_web3()
-    courier_address = web3.to_checksum_address(courier_address)
+    courier_address = to_checksum_address(courier_address)
 
     # Verify payment has been made via smart contract
     try:
-        abi = json.loads(read_file("./blockchain/output/OrderPayment.abi"))
-        contract = web3.eth.contract(address=order.contract_address, abi=abi)
+        contract = get_order_contract(order)
 
-        is_paid = contract.functions.isPaid().call()
+        is_paid = contract.is_paid()
         if not is_paid:
             return jsonify(message="Transfer not complete."), 400
 
         # Assign courier to contract (owner pays for this transaction)
         owner_address, owner_private_key = get_owner_account()
 
-        assign_txn = contract.functions.assignCourier(
-            courier_address
-        ).build_transaction({
+        assign_call = contract.assign_courier(courier_address)
+        gas_limit = contract.estimate_gas(assign_call, {'from': owner_address})
+
+        build_transaction = lambda nonce: assign_call.build_transaction({
             'from': owner_address,
-            'nonce': web3.eth.get_transaction_count(owner_address),
-            'gas': 200000,
-            'gasPrice': web3.eth.gas_price
+            'nonce': nonce,
+            'gas': gas_limit,
+            **gas_oracle.fees()
         })
 
-        # Send transaction
-        receipt = send_transaction(assign_txn, owner_private_key)
+        if TRANSACTION_CONFIRMATION == "async":
+            # Mark the order picked up right away, the tracker reverts it if the assignment is not mined
+            order.status = "PENDING"
+            database.session.commit()
+
+            try:
+                transaction_hash = owner_nonces.submit_transaction(
+                    owner_address,
+                    owner_private_key,
+                    build_transaction,
+                    callback=lambda status, receipt: courier_assignment_finished(order_id, status)
+                )
+            except Exception:
+                order.status = "CREATED"
+                database.session.commit()
+                raise
+
+            return jsonify(transactionHash=transaction_hash), 200
+
+        # Send transaction and wait for its receipt, owner_nonces allocates the nonce (see NONCE_BACKEND)
+        receipt = owner_nonces.send_transaction(owner_address, owner_private_key, build_transaction)
 
         # Update order status
         order.status = "PENDING"
@@ -151,6 +186,36 @@ def pick_up_order():
         return jsonify(message=f"Error assigning courier: {str(e)}"), 400
 
 
+def courier_assignment_finished(order_id, status):
+    """Receipt callback of an asynchronous pick up, a reverted or dropped assignment frees the order again"""
+    if status not in (FAILED, DROPPED):
+        return
+
+    Order.query.filter(Order.id == order_id, Order.status == "PENDING").update({"status": "CREATED"})
+    database.session.commit()
+    print(f"Courier assignment of order {order_id} {status.lower()}, order is available again")
+
+
+@application.route("/transaction_status", methods=["GET"])
+@jwt_required()
+def transaction_status():
+    """Get state of a transaction sent by /pick_up_order"""
+    claims = get_jwt()
+    if claims.get("roles") != "courier":
+        return jsonify(msg="Missing Authorization Header"), 401
+
+    transaction_hash = request.args.get("hash", "")
+    if not TRANSACTION_HASH.match(transaction_hash):
+        return jsonify(message="Invalid transaction hash."), 400
+
+    try:
+        status = receipt_tracker.status(transaction_hash)
+    except Exception as e:
+        return jsonify(message=f"Error checking transaction: {str(e)}"), 400
+
+    return jsonify(hash=transaction_hash, status=status), 200
+
+
 if __name__ == "__main__":
     PORT = os.environ.get("PORT", "5000")
     HOST = "0.0.0.0" if "PRODUCTION" in os.environ else "localhost"
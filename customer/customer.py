@@ -1,14 +1,40 @@
 import datetime
+import gzip
+import hashlib
 import json
 import os
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from decimal import Decimal, InvalidOperation
 
 from flask import Flask, jsonify, request
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt, get_jwt_identity
-
-
-from configuration import Configuration
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import aliased, selectinload
+
+
+from addresses import is_valid_address, to_checksum_address
+from artifacts import contract_artifacts
+from autocomplete import build_autocomplete_index
+from batcher import OrderBatcher
+from caching import LRUCache
+from category_index import build_category_index
+from columnar import build_columnar_catalog
+from catalog import get_catalog_version, get_catalog_snapshot, get_catalog_changes, build_product_categories
+from configuration import Configuration, SEARCH_CACHE_SIZE, SEARCH_BACKEND, CATALOG_POLL_INTERVAL, FUZZY_MAX_DISTANCE
+from configuration import CONTRACT_DEPLOYMENT, DEPLOYER_POLL_INTERVAL, DEPLOYER_MAX_ATTEMPTS
+from configuration import CONTRACT_MODE, POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_RATE_WINDOW, POOL_POLL_INTERVAL
+from configuration import ORDER_BATCH_WINDOW, ORDER_BATCH_SIZE, ORDER_BATCH_TIMEOUT, IDEMPOTENCY_KEY_TTL, IDEMPOTENCY_LOCK_TIMEOUT
+from configuration import BULK_ORDER_LIMIT
+from contracts import deploy_order_contract, get_order_contract, order_contract_name, ZERO_ADDRESS
+from deployer import ContractDeployer
+from fuzzy import FuzzyIndexBuilder
+from gas import gas_oracle, gas_estimator
+from idempotency import IdempotencyStore
 from models import database, Product, Category, User, Order, OrderProduct
-from utilities import is_valid_address, get_web3, read_file, get_owner_account, send_transaction
+from provisioner import EscrowProvisioner
+from receipts import receipt_tracker
+from utilities import get_web3
+from wallet import get_owner_account
 
 application= Flask(__name__)
 application.config.from_object(Configuration)
@@ -20,10 +46,72 @@ application.config.from_object(Configuration)
 jwt = JWTManager(application)
 database.init_app(application)
 
+# Compiled contracts are read once per process
+contract_artifacts.load_all()
+
+# Receipt callbacks confirm owner nonces through the database
+receipt_tracker.init_app(application)
+
+# Background contract deployment of async /order orders (see CONTRACT_DEPLOYMENT)
+# and of /order_bulk orders in every mode
+contract_deployer = ContractDeployer(
+    application,
+    DEPLOYER_POLL_INTERVAL,
+    DEPLOYER_MAX_ATTEMPTS,
+    batch_size=ORDER_BATCH_SIZE if ORDER_BATCH_WINDOW > 0 and CONTRACT_MODE in ("clone", "registry") else 1
+)
+contract_deployer.start()
+
+# Pre-deployed contracts for new orders, see CONTRACT_MODE
+escrow_provisioner = None
+if CONTRACT_MODE == "pool":
+    escrow_provisioner = EscrowProvisioner(application, POOL_POLL_INTERVAL, POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_RATE_WINDOW)
+    escrow_provisioner.start()
+
+# Results of /order requests per Idempotency-Key
+idempotency_keys = IdempotencyStore(IDEMPOTENCY_KEY_TTL, IDEMPOTENCY_LOCK_TIMEOUT)
+
+# Batched contract creation of synchronous orders, see ORDER_BATCH_WINDOW.
+# Full deployments and pooled contracts cannot be batched, they are created per order
+order_batcher = None
+if CONTRACT_DEPLOYMENT == "sync" and ORDER_BATCH_WINDOW > 0 and CONTRACT_MODE in ("clone", "registry"):
+    order_batcher = OrderBatcher(ORDER_BATCH_WINDOW, ORDER_BATCH_SIZE)
+    order_batcher.start()
+
+# Serialized search responses, keyed by (catalog version, name, category).
+# Every worker process keeps its own cache, the shared catalog version keeps them consistent.
+search_cache = LRUCache(SEARCH_CACHE_SIZE)
+search_cache_version = 0
+
+# Allowed values of the sort parameter, ties are always broken by id
+SEARCH_SORT_COLUMNS = {
+    "id": (Product.id,),
+    "price": (Product.price, Product.id),
+    "name": (Product.name,)
+}
+SEARCH_MAX_PER_PAGE = 1000
+# Keeps (page - 1) * perPage far below the range of the SQL OFFSET
+SEARCH_MAX_PAGE = 1000000
+# Largest price of a DECIMAL(10,2) column
+SEARCH_MAX_PRICE = Decimal("99999999.99")
+# Category filters selecting more products are applied as EXISTS subqueries instead of an id list
+SEARCH_MAX_ID_LIST = 1000
+FUZZY_FLAGS = {"": False, "0": False, "false": False, "1": True, "true": True}
+CATEGORY_MATCH_MODES = ("any", "all")
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+# Fuzzy index of the newest catalog snapshot, rebuilt in the background after catalog changes
+fuzzy_indexes = FuzzyIndexBuilder()
+
+# Serialized (and compressed) full catalog snapshots of /catalog_sync, keyed by (catalog version, gzip).
+# Deltas depend on since and are built per request
+sync_cache = LRUCache(4)
+
 @application.route("/search", methods=["GET"])
 @jwt_required()
 def search():
     """Search for products by name and/or category"""
+    global search_cache_version
 
     # Verify user
     claims = get_jwt()
@@ -31,79 +119,230 @@ def search():
         return jsonify(msg="Missing Authorization Header"), 401
 
     # Get query parameters
-    name_filter = request.args.get("name", "");
-    category_filter = request.args.get("category", "");
-    # min_price = request.args.get("minPrice", None)
-    # max_price = request.args.get("maxPrice", None)
+    filters, error = parse_search_parameters(request.args)
+    if error:
+        return jsonify(message=error), 400
+
+    # Drop responses built from an older catalog
+    catalog_version = get_catalog_version()
+    if catalog_version > search_cache_version:
+        search_cache.clear()
+        search_cache_version = catalog_version
+
+    # LIKE is case insensitive, so filters differing only in case share an entry
+    cache_key = (
+        catalog_version,
+        filters["name"].lower(),
+        tuple(category.lower() for category in filters["categories"]),
+        filters["category_match"],
+        str(filters["min_price"]),
+        str(filters["max_price"]),
+        filters["sort"],
+        filters["page"],
+        filters["per_page"],
+        filters["fuzzy"]
+    )
+
+    # Repeated polls with an unchanged catalog are answered without running any product queries
+    etag = make_etag(cache_key)
+    current = True
+    if request.if_none_match.contains(etag):
+        response = application.response_class(status=304)
+    else:
+        body = search_cache.get(cache_key)
+        if body is None:
+            # Fuzzy results come from the index of an older snapshot while the new one is built,
+            # and from the non-fuzzy search until the first index is ready
+            fuzzy = None
+            if filters["fuzzy"] and filters["name"]:
+                fuzzy = fuzzy_indexes.get(get_catalog_snapshot(version=catalog_version))
+                current = fuzzy is not None and fuzzy[0].version == catalog_version
+
+            body = jsonify(**search_catalog(filters, catalog_version, fuzzy)).get_data()
+
+            # interim results are neither cached nor revalidated, the next request gets the new index
+            if current:
+                search_cache.put(cache_key, body)
+
+        response = application.response_class(body, status=200, mimetype="application/json")
+
+    if current:
+        response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def make_etag(cache_key):
+    """Build an ETag from the catalog version and the normalized query parameters"""
+    return hashlib.sha1(json.dumps(cache_key).encode("utf-8")).hexdigest()
+
+
+def parse_search_parameters(args):
+    """Validate search query parameters, returns (filters, error message)"""
+    filters = {
+        "name": args.get("name", ""),
+        "categories": [category for category in args.getlist("category") if category],
+        "category_match": args.get("categoryMatch", "any"),
+        "min_price": None,
+        "max_price": None,
+        "sort": args.get("sort", "id"),
+        "page": 1,
+        "per_page": None,
+        "fuzzy": FUZZY_FLAGS.get(args.get("fuzzy", "").lower(), None)
+    }
+
+    if filters["fuzzy"] is None:
+        return None, "Invalid fuzzy."
+
+    if filters["category_match"] not in CATEGORY_MATCH_MODES:
+        return None, "Invalid categoryMatch."
+
+    # Price range
+    for field, key in (("minPrice", "min_price"), ("maxPrice", "max_price")):
+        value = args.get(field, None)
+        if value is None:
+            continue
+
+        try:
+            price = Decimal(value)
+        except InvalidOperation:
+            return None, f"Invalid {field}."
+
+        if not price.is_finite() or price < 0 or price > SEARCH_MAX_PRICE:
+            return None, f"Invalid {field}."
+
+        filters[key] = price
+
+    if filters["min_price"] is not None and filters["max_price"] is not None:
+        if filters["min_price"] > filters["max_price"]:
+            return None, "Invalid price range."
+
+    if filters["sort"] not in SEARCH_SORT_COLUMNS:
+        return None, "Invalid sort."
+
+    # Pagination, only applied when perPage is given
+    for field, key in (("page", "page"), ("perPage", "per_page")):
+        value = args.get(field, None)
+        if value is None:
+            continue
+
+        # isdigit alone accepts digits like "²" that int() rejects
+        if not value.isascii() or not value.isdigit() or int(value) <= 0:
+            return None, f"Invalid {field}."
+
+        filters[key] = int(value)
+
+    if filters["page"] > SEARCH_MAX_PAGE:
+        return None, "Invalid page."
+
+    if filters["per_page"] is not None and filters["per_page"] > SEARCH_MAX_PER_PAGE:
+        return None, "Invalid perPage."
+
+    return filters, None
+
+
+def select_categories(filters, catalog_version):
+    """
+    Resolve category filters through the in-memory bitmap index.
+    Returns (product ids, matching category names), or (None, None) when no category filter is given.
+    """
+    if not filters["categories"]:
+        return None, None
+
+    snapshot = get_catalog_snapshot(version=catalog_version)
+    category_index = snapshot.index("categories", build_category_index)
+
+    return category_index.select(filters["categories"], filters["category_match"] == "all")
+
+
+def category_filter_condition(filters, catalog_version):
+    """
+    Category filters as one EXISTS subquery per pattern over the category names it matches,
+    combined like select_categories. Keeps statements small when many products match.
+    """
+    snapshot = get_catalog_snapshot(version=catalog_version)
+    category_index = snapshot.index("categories", build_category_index)
+
+    # aliased, so the subqueries never correlate with an outer query over categories
+    linked_category = aliased(Category)
+    conditions = [
+        Product.categories.of_type(linked_category).any(
+            linked_category.name.in_(category_index.matching_names(pattern))
+        )
+        for pattern in filters["categories"]
+    ]
+
+    return and_(*conditions) if filters["category_match"] == "all" else or_(*conditions)
+
+
+def search_catalog(filters, catalog_version, fuzzy=None):
+    """Run search queries and build the response payload, fuzzy is (snapshot, index) of FuzzyIndexBuilder"""
+    if fuzzy is not None:
+        return fuzzy_search_catalog(filters, catalog_version, *fuzzy)
+
+    if SEARCH_BACKEND == "columnar":
+        return columnar_search_catalog(filters, catalog_version)
+
+    name_filter = filters["name"]
+    min_price = filters["min_price"]
+    max_price = filters["max_price"]
 
     # start with base query
     products_query = Product.query
     categories_query = Category.query
 
-    # apply filters if provided
+    # conditions a single product has to satisfy
+    product_conditions = []
+
     if name_filter:
-        products_query = products_query.filter(Product.name.like(f"%{name_filter}%"))
-
-    if category_filter:
-        # filter products that belong to categories matching the filter.
-        products_query = products_query.join(
-            Product.categories
-        ).filter(
-            Category.name.like(f"%{category_filter}%")
-        )
+        product_conditions.append(Product.name.like(f"%{name_filter}%"))
+
+    if min_price is not None:
+        product_conditions.append(Product.price >= min_price)
+
+    if max_price is not None:
+        product_conditions.append(Product.price <= max_price)
+
+    # apply filters if provided
+    # filter products that belong to categories matching the filters
+    # bitmap unions / intersections replace the JOIN + DISTINCT over product_categories
+    product_ids, matching_names = select_categories(filters, catalog_version)
+
+    if product_ids is not None:
+        if not product_ids:
+            return {"categories": [], "products": []}
+
+        if len(product_ids) <= SEARCH_MAX_ID_LIST:
+            product_conditions.append(Product.id.in_(list(product_ids)))
+        else:
+            product_conditions.append(category_filter_condition(filters, catalog_version))
 
         # filter categories by name
-        categories_query = categories_query.filter(
-            Category.name.like(f"%{category_filter}%")
-        )
+        categories_query = categories_query.filter(Category.name.in_(matching_names))
 
-    # # Apply price filters
-    # if min_price is not None:
-    #     try:
-    #         min_price_value = float(min_price)
-    #         products_query = products_query.filter(Product.price >= min_price_value)
-    #     except (ValueError, TypeError):
-    #         pass  # Ignore invalid min_price values
-    #
-    # if max_price is not None:
-    #     try:
-    #         max_price_value = float(max_price)
-    #         products_query = products_query.filter(Product.price <= max_price_value)
-    #     except (ValueError, TypeError):
-    #         pass  # Ignore invalid max_price values
-
-    # if name filter is applied only show categories of matching products
-    if name_filter:
-        categories_query = categories_query.join(
-            Category.products
-        ).filter(
-            Product.name.like(f"%{name_filter}%")
-        )
+    if product_conditions:
+        products_query = products_query.filter(*product_conditions)
 
-    # # Apply price filters to categories query as well
-    # if min_price is not None or max_price is not None:
-    #     categories_query = categories_query.join(Category.products)
-    #
-    #     if min_price is not None:
-    #         try:
-    #             min_price_value = float(min_price)
-    #             categories_query = categories_query.filter(Product.price >= min_price_value)
-    #         except (ValueError, TypeError):
-    #             pass
-    #
-    #     if max_price is not None:
-    #         try:
-    #             max_price_value = float(max_price)
-    #             categories_query = categories_query.filter(Product.price <= max_price_value)
-    #         except (ValueError, TypeError):
-    #             pass
+        # only show categories of matching products
+        categories_query = categories_query.filter(
+            Category.products.any(and_(*product_conditions))
+        )
 
     # Get unique categories
-    categories = categories_query.distinct().all()
+    categories = categories_query.all()
     category_names = [cat.name for cat in categories]
 
     # Get products with all their categories
-    products = products_query.distinct().all()
+    products_query = products_query.order_by(*SEARCH_SORT_COLUMNS[filters["sort"]])
+
+    if filters["per_page"] is not None:
+        products_query = products_query.limit(
+            filters["per_page"]
+        ).offset(
+            (filters["page"] - 1) * filters["per_page"]
+        )
+
+    products = products_query.options(selectinload(Product.categories)).all()
 
     products_list = []
 
@@ -116,78 +355,427 @@ def search():
         }
         products_list.append(product_dict)
 
-    return jsonify(categories=category_names, products=products_list), 200
+    return {"categories": category_names, "products": products_list}
 
-@application.route("/order", methods=["POST"])
+
+def columnar_search_catalog(filters, catalog_version):
+    """
+    Evaluate search filters as vectorized masks over the columnar catalog snapshot.
+    Only the requested page is turned into dictionaries.
+    """
+    snapshot = get_catalog_snapshot(version=catalog_version)
+    catalog = snapshot.index("columnar", build_columnar_catalog)
+    category_index = snapshot.index("categories", build_category_index)
+    product_categories = snapshot.index("product_categories", build_product_categories)
+
+    # rows satisfying every product condition
+    mask = catalog.name_mask(filters["name"])
+    mask &= catalog.price_mask(filters["min_price"], filters["max_price"])
+
+    product_ids, matching_names = select_categories(filters, catalog_version)
+    if product_ids is not None:
+        mask &= catalog.id_mask(product_ids)
+
+    rows = catalog.ordered_rows(mask, filters["sort"])
+
+    # categories matching the category filters that contain at least one matching product
+    if matching_names is None:
+        matching_names = category_index.bitmaps.keys()
+
+    has_product_conditions = (
+        filters["name"] or filters["min_price"] is not None or filters["max_price"] is not None
+        or product_ids is not None
+    )
+
+    if has_product_conditions:
+        selected_ids = catalog.id_bitmap(rows)
+        category_names = [name for name in matching_names if category_index.bitmaps[name].intersect(selected_ids)]
+    else:
+        category_names = list(matching_names)
+
+    if filters["per_page"] is not None:
+        offset = (filters["page"] - 1) * filters["per_page"]
+        rows = rows[offset:offset + filters["per_page"]]
+
+    products_list = []
+
+    for row in rows.tolist():
+        product_id = int(catalog.ids[row])
+        products_list.append({
+            "categories": product_categories[product_id],
+            "id": product_id,
+            "name": catalog.name(row),
+            "price": int(catalog.prices[row]) / 100
+        })
+
+    return {"categories": sorted(category_names), "products": products_list}
+
+
+def fuzzy_search_catalog(filters, catalog_version, snapshot, fuzzy_index):
+    """
+    Search products whose name tokens are within a small edit distance of the name filter.
+    Runs on the in-memory catalog snapshot of fuzzy_index, products are ranked by distance unless sort is given.
+    """
+    product_categories = snapshot.index("product_categories", build_product_categories)
+
+    product_ids, matching_names = select_categories(filters, catalog_version)
+    min_price = filters["min_price"]
+    max_price = filters["max_price"]
+
+    category_names = set()
+    matches = []
+
+    for position, distance in fuzzy_index.search(filters["name"], FUZZY_MAX_DISTANCE):
+        product_id, name, price = snapshot.products[position]
+
+        if min_price is not None and price < min_price:
+            continue
+
+        if max_price is not None and price > max_price:
+            continue
+
+        categories = product_categories[product_id]
+
+        if product_ids is None:
+            category_names.update(categories)
+        elif product_id in product_ids:
+            category_names.update(cat for cat in categories if cat in matching_names)
+        else:
+            continue
+
+        matches.append((product_id, name, price, distance))
+
+    # names compare case insensitively, like the columnar and SQL searches
+    if filters["sort"] == "price":
+        matches.sort(key=lambda match: (match[2], match[0]))
+    elif filters["sort"] == "name":
+        matches.sort(key=lambda match: (match[1].lower(), match[0]))
+
+    if filters["per_page"] is not None:
+        offset = (filters["page"] - 1) * filters["per_page"]
+        matches = matches[offset:offset + filters["per_page"]]
+
+    products_list = [
+        {
+            "categories": product_categories[product_id],
+            "id": product_id,
+            "name": name,
+            "price": float(price),
+            "distance": distance
+        }
+        for product_id, name, price, distance in matches
+    ]
+
+    return {"categories": sorted(category_names), "products": products_list}
+
+
+@application.route("/autocomplete", methods=["GET"])
 @jwt_required()
-def create_order():
-    """Create a new order"""
+def autocomplete():
+    """Get product and category names starting with prefix"""
+
     # Verify user
     claims = get_jwt()
     if claims.get("roles") != "customer":
         return jsonify(msg="Missing Authorization Header"), 401
 
-    # Customer email
-    customer_email = get_jwt_identity();
+    prefix = request.args.get("prefix", "")
 
-    # Request data:
-    data = request.json if request.json else {}
+    limit = request.args.get("limit", "10")
+    if not limit.isascii() or not limit.isdigit() or int(limit) <= 0 or int(limit) > AUTOCOMPLETE_MAX_LIMIT:
+        return jsonify(message="Invalid limit."), 400
+    limit = int(limit)
 
-    if "requests" not in data:
-        return jsonify(message="Field requests is missing."), 400
+    # Served from memory, the catalog version is only polled every CATALOG_POLL_INTERVAL seconds
+    snapshot = get_catalog_snapshot(CATALOG_POLL_INTERVAL)
+    index = snapshot.index("autocomplete", build_autocomplete_index)
 
-    requests_list = data["requests"]
-    if not isinstance(requests_list, list):
-        return jsonify(message="Field requests is missing."), 400
+    return jsonify(
+        products=index["products"].complete(prefix, limit),
+        categories=index["categories"].complete(prefix, limit)
+    ), 200
 
-    # validate each request
-    validated_items = []
+
+@application.route("/catalog_sync", methods=["GET"])
+@jwt_required()
+def catalog_sync():
+    """
+    Get the full catalog, or only products and categories changed since a catalog version.
+    A full snapshot is returned when since is missing or older than the change log.
+    """
+
+    # Verify user
+    claims = get_jwt()
+    if claims.get("roles") != "customer":
+        return jsonify(msg="Missing Authorization Header"), 401
+
+    catalog_version = get_catalog_version()
+
+    since = request.args.get("since", None)
+    if since is not None:
+        if not since.isascii() or not since.isdigit() or int(since) > catalog_version:
+            return jsonify(message="Invalid since."), 400
+        since = int(since)
+
+    use_gzip = "gzip" in request.accept_encodings
+
+    changes = None
+    if since is not None:
+        changes = get_catalog_changes(since)
+
+    if changes is None:
+        cache_key = (catalog_version, use_gzip)
+
+        body = sync_cache.get(cache_key)
+        if body is None:
+            body = encode_catalog_sync(build_full_catalog_sync(catalog_version), use_gzip)
+            sync_cache.put(cache_key, body)
+    else:
+        body = encode_catalog_sync(build_catalog_delta(catalog_version, changes), use_gzip)
+
+    response = application.response_class(body, status=200, mimetype="application/json")
+    response.vary.add("Accept-Encoding")
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+def encode_catalog_sync(payload, use_gzip):
+    """Serialize a catalog sync payload, gzip compressed if the client accepts it"""
+    body = jsonify(**payload).get_data()
+    if use_gzip:
+        body = gzip.compress(body)
+    return body
+
+
+def build_full_catalog_sync(catalog_version):
+    """Build full catalog sync payload straight from the in-memory snapshot"""
+    snapshot = get_catalog_snapshot(version=catalog_version)
+    product_categories = snapshot.index("product_categories", build_product_categories)
+
+    products_list = [
+        {
+            "categories": product_categories[product_id],
+            "id": product_id,
+            "name": name,
+            "price": float(price)
+        }
+        for product_id, name, price in snapshot.products
+    ]
+
+    return {
+        "version": catalog_version,
+        "full": True,
+        "categories": sorted(snapshot.categories),
+        "products": products_list
+    }
+
+
+def build_catalog_delta(catalog_version, changes):
+    """Build delta catalog sync payload of (product ids, category ids) changed since the client's version"""
+    product_ids, category_ids = changes
+
+    products = []
+    if product_ids:
+        products = Product.query.filter(
+            Product.id.in_(product_ids)
+        ).order_by(Product.id).options(selectinload(Product.categories)).all()
+
+    categories = []
+    if category_ids:
+        categories = Category.query.filter(Category.id.in_(category_ids)).all()
+
+    products_list = [
+        {
+            "categories": [cat.name for cat in product.categories],
+            "id": product.id,
+            "name": product.name,
+            "price": float(product.price)
+        }
+        for product in products
+    ]
+
+    return {
+        "version": catalog_version,
+        "full": False,
+        "categories": sorted(cat.name for cat in categories),
+        "products": products_list
+    }
+
+
+@application.route("/metrics", methods=["GET"])
+@jwt_required()
+def metrics():
+    """Get cache and order batch metrics of this worker process, for the owner"""
+    claims = get_jwt()
+    if claims.get("roles") != "owner":
+        return jsonify(msg="Missing Authorization Header"), 401
+
+    metrics = {
+        "search_cache": search_cache.stats(),
+        "sync_cache": sync_cache.stats(),
+        "contract_cache": contract_artifacts.stats(),
+        "gas_estimates": gas_estimator.stats(),
+        "receipts": receipt_tracker.stats()
+    }
+
+    if order_batcher:
+        metrics["order_batcher"] = order_batcher.stats()
+
+    return jsonify(metrics), 200
+
+def validate_order_requests(requests_list, products=None):
+    """
+    Validate order requests, returns (validated items, error message).
+    All products are fetched with one IN query (or taken from products, a preloaded
+    {id: Product} dict), errors are reported for the lowest failing index exactly
+    as if every request was checked in turn.
+    """
+    checked = []
+    first_error = None
 
     for index, item in enumerate(requests_list):
         # validate id
         if "id" not in item:
-            return jsonify(message=f"Product id is missing for request number {index}."), 400
+            first_error = f"Product id is missing for request number {index}."
+            break
 
         # Validate quantity
         if "quantity" not in item:
-            return jsonify(message=f"Product quantity is missing for request number {index}."), 400
+            first_error = f"Product quantity is missing for request number {index}."
+            break
 
         product_id = item["id"]
         product_quantity = item["quantity"]
 
         # Validate id is a positive integer
         if not isinstance(product_id, int) or product_id <= 0:
-            return jsonify(message=f"Invalid product id for request number {index}."), 400
+            first_error = f"Invalid product id for request number {index}."
+            break
 
         # Validate quantity is a positive integer
         if not isinstance(product_quantity, int) or product_quantity <= 0:
-            return jsonify(message=f"Invalid product quantity for request number {index}."), 400
+            first_error = f"Invalid product quantity for request number {index}."
+            break
+
+        checked.append((index, product_id, product_quantity))
+
+    # Check that products exist, for all well formed requests before the first error
+    if products is None:
+        products = load_products({product_id for _, product_id, _ in checked})
 
-        # Check if product exists
-        product = Product.query.filter(Product.id == product_id).first();
-        if not product:
-            return jsonify(message=f"Invalid product for request number {index}."), 400
+    validated_items = []
+
+    for index, product_id, product_quantity in checked:
+        if product_id not in products:
+            return None, f"Invalid product for request number {index}."
 
         validated_items.append({
-            "product": product,
+            "product": products[product_id],
             "quantity": product_quantity
         })
 
+    if first_error:
+        return None, first_error
+
+    return validated_items, None
+
+
+@application.route("/order", methods=["POST"])
+@jwt_required()
+def create_order():
+    """Create a new order, retries with the same Idempotency-Key header return the original order"""
+    # Verify user
+    claims = get_jwt()
+    if claims.get("roles") != "customer":
+        return jsonify(msg="Missing Authorization Header"), 401
+
+    # Customer email
+    customer_email = get_jwt_identity();
+
+    # Request data:
+    data = request.json if request.json else {}
+
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key is None:
+        return place_order(customer_email, data)
+
+    if not idempotency_key.strip() or len(idempotency_key) > 255:
+        return jsonify(message="Invalid idempotency key."), 400
+
+    request_hash = hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    previous = idempotency_keys.claim(customer_email, idempotency_key, request_hash)
+    if previous is not None:
+        if previous.request_hash != request_hash:
+            return jsonify(message="Idempotency key was used for a different request."), 400
+
+        if previous.state == "IN_PROGRESS":
+            return jsonify(message="Order with this idempotency key is in progress."), 409
+
+        return jsonify(id=previous.order_id), 200
+
+    try:
+        response, status_code = place_order(customer_email, data, idempotency_key)
+    except Exception:
+        idempotency_keys.release(customer_email, idempotency_key)
+        raise
+
+    # Created orders completed the key with their transaction, failed requests may be retried with the same key
+    if status_code != 200:
+        idempotency_keys.release(customer_email, idempotency_key)
+
+    return response, status_code
+
+
+def load_products(product_ids):
+    """Get {id: Product} of the existing products among product_ids with one IN query"""
+    if not product_ids:
+        return {}
+
+    return {
+        product.id: product
+        for product in Product.query.filter(Product.id.in_(product_ids)).all()
+    }
+
+
+def validate_order(data, products=None):
+    """Validate one order payload, returns (validated items, checksum customer address, error message)"""
+    if "requests" not in data:
+        return None, None, "Field requests is missing."
+
+    requests_list = data["requests"]
+    if not isinstance(requests_list, list):
+        return None, None, "Field requests is missing."
+
+    # validate each request
+    validated_items, error = validate_order_requests(requests_list, products)
+    if error:
+        return None, None, error
+
     # Check address field
-    customer_address = None
     # Address validation must be stricter to pass the tests.
     if "address" not in data:
-        return jsonify(message="Field address is missing."), 400
+        return None, None, "Field address is missing."
 
     customer_address = data.get("address")
     if not customer_address or not isinstance(customer_address, str) or customer_address.strip() == "":
-        return jsonify(message="Field address is missing."), 400
+        return None, None, "Field address is missing."
 
     if not is_valid_address(customer_address):
-        return jsonify(message="Invalid address."), 400
+        return None, None, "Invalid address."
 
-    web3 = get_web3()
-    customer_address = web3.to_checksum_address(customer_address)
+    return validated_items, to_checksum_address(customer_address), None
+
+
+def place_order(customer_email, data, idempotency_key=None):
+    """
+    Validate order request of a customer, store the order and create its contract.
+    A claimed idempotency_key is completed in the same transaction as the order.
+    """
+    validated_items, customer_address, error = validate_order(data)
+    if error:
+        return jsonify(message=error), 400
 
     # calculate total price
     total_price = sum(item["product"].price * item["quantity"] for item in validated_items)
@@ -206,68 +794,150 @@ def create_order():
     database.session.add(new_order)
     database.session.flush()  # Get order ID
 
-    # Create order products
-    for item in validated_items:
-        order_product = OrderProduct(
-            order_id=new_order.id,
-            product_id=item["product"].id,
-            quantity=item["quantity"]
-        )
-        database.session.add(order_product)
+    # Create order products with a single multi-row INSERT
+    if validated_items:
+        database.session.execute(OrderProduct.__table__.insert().values([
+            {
+                "order_id": new_order.id,
+                "product_id": item["product"].id,
+                "quantity": item["quantity"]
+            }
+            for item in validated_items
+        ]))
 
     # Deploy Smart Contract only if address was provided
-    if customer_address:
+    if customer_address and CONTRACT_DEPLOYMENT == "sync":
         try:
-            # Load contract ABI and bytecode
-            abi = json.loads(read_file("./blockchain/output/OrderPayment.abi"))
-            bytecode = read_file("./blockchain/output/OrderPayment.bin")
+            if order_batcher:
+                # wait until the batch holding this order is mined, a still queued order is withdrawn on timeout
+                future = order_batcher.submit(new_order.id, customer_address, total_price)
+                try:
+                    new_order.contract_address = future.result(ORDER_BATCH_TIMEOUT)
+                except FutureTimeoutError:
+                    future.cancel()
+                    raise Exception(f"Order batch not mined after {ORDER_BATCH_TIMEOUT:g} seconds")
+            else:
+                new_order.contract_address = deploy_order_contract(new_order.id, customer_address, total_price)
+            new_order.contract_name = order_contract_name()
+            new_order.contract_status = "DEPLOYED"
+
+        except Exception as e:
+            database.session.rollback()
+            return jsonify(message=f"Contract deployment failed: {str(e)}"), 400
+
+    if idempotency_key is not None:
+        idempotency_keys.complete(database.session, customer_email, idempotency_key, new_order.id)
+
+    # Save transaction
+    database.session.commit()
+
+    # Pending contract is deployed in the background
+    if new_order.contract_status == "PENDING":
+        contract_deployer.notify()
 
-            # Get owner account
-            owner_address, owner_private_key = get_owner_account()
+    # Refill the pool after a contract was claimed
+    if escrow_provisioner:
+        escrow_provisioner.notify()
 
-            web3 = get_web3()
+    # return order id
+    return jsonify(id=new_order.id), 200
 
-            # Create contract instance
-            Contract = web3.eth.contract(abi=abi, bytecode=bytecode)
 
-            # Calculate order price in wei
-            order_price_wei = int(total_price* 100)
+@application.route("/order_bulk", methods=["POST"])
+@jwt_required()
+def create_orders_bulk():
+    """
+    Create many orders with one request, body is {"orders": [<payload of /order>, ...]}.
+    Every order is validated like /order with one product query for all of them, valid orders
+    are stored in one transaction with a PENDING contract, in every CONTRACT_DEPLOYMENT mode.
+    The background deployer creates their contracts, as batches when batching is on.
+    Returns one result per order, {"id": ...} or {"message": ...}.
+    """
+    claims = get_jwt()
+    if claims.get("roles") != "customer":
+        return jsonify(msg="Missing Authorization Header"), 401
 
-            # Constructor for transaction
-            # Courier address is 0x0 at the start we will assign it later
-            zero_address = web3.to_checksum_address("0x0000000000000000000000000000000000000000")
+    customer_email = get_jwt_identity()
+    data = request.json if request.json else {}
 
-            # Pass arguments as separate parameters, NOT as a dictionary
-            constructor_txn = Contract.constructor(
-                owner_address,
-                zero_address,  # No courier assigned yet
-                customer_address,
-                order_price_wei
-            ).build_transaction({
-                'from': owner_address,
-                'nonce': web3.eth.get_transaction_count(owner_address),
-                'gas': 2000000,
-                'gasPrice': web3.eth.gas_price
-            })
+    orders_list = data.get("orders")
+    if not isinstance(orders_list, list) or not orders_list:
+        return jsonify(message="Field orders is missing."), 400
 
-            # Sign and send transaction
-            receipt = send_transaction(constructor_txn, owner_private_key)
+    if len(orders_list) > BULK_ORDER_LIMIT:
+        return jsonify(message=f"At most {BULK_ORDER_LIMIT} orders per request."), 400
 
-            # Get contract address
-            contract_address = receipt['contractAddress']
+    # One product query for every well formed request of every order
+    product_ids = {
+        item["id"]
+        for order_data in orders_list if isinstance(order_data, dict) and isinstance(order_data.get("requests"), list)
+        for item in order_data["requests"] if isinstance(item, dict) and isinstance(item.get("id"), int)
+    }
+    products = load_products(product_ids)
 
-            # Store contract address in order
-            new_order.contract_address = contract_address
+    results = []
+    valid_orders = []
 
-        except Exception as e:
-            database.session.rollback()
-            return jsonify(message=f"Contract deployment failed: {str(e)}"), 400
+    for order_data in orders_list:
+        if not isinstance(order_data, dict):
+            results.append({"message": "Field requests is missing."})
+            continue
 
-    # Save transaction
+        validated_items, customer_address, error = validate_order(order_data, products)
+        if error:
+            results.append({"message": error})
+            continue
+
+        result = {}
+        results.append(result)
+        valid_orders.append((result, validated_items, customer_address))
+
+    if not valid_orders:
+        return jsonify(results=results), 200
+
+    customer = User.query.filter(User.email == customer_email).first()
+    timestamp = datetime.datetime.utcnow()
+
+    new_orders = [
+        Order(
+            customer_id=customer.id,
+            price=sum(item["product"].price * item["quantity"] for item in validated_items),
+            status="CREATED",
+            timestamp=timestamp,
+            customer_address=customer_address
+        )
+        for _, validated_items, customer_address in valid_orders
+    ]
+
+    database.session.add_all(new_orders)
+    database.session.flush()  # Get order IDs
+
+    # Order products of all orders with a single multi-row INSERT
+    order_products = [
+        {
+            "order_id": new_order.id,
+            "product_id": item["product"].id,
+            "quantity": item["quantity"]
+        }
+        for new_order, (_, validated_items, _) in zip(new_orders, valid_orders)
+        for item in validated_items
+    ]
+    if order_products:
+        database.session.execute(OrderProduct.__table__.insert().values(order_products))
+
+    # Orders are stored before any contract exists, so contracts created on the chain always have their order
     database.session.commit()
 
-    # return order id
-    return jsonify(id=new_order.id), 200
+    for (result, _, _), new_order in zip(valid_orders, new_orders):
+        result["id"] = new_order.id
+
+    # Pending contracts are deployed in the background, in batches of ORDER_BATCH_SIZE when batching is on
+    contract_deployer.notify()
+
+    if escrow_provisioner:
+        escrow_provisioner.notify()
+
+    return jsonify(results=results), 200
 
 
 @application.route("/generate_invoice", methods=["POST"])
@@ -313,27 +983,33 @@ def generate_invoice():
         return jsonify(message="Invalid address."), 400
 
     web3 = get_web3()
-    customer_address = web3.to_checksum_address(customer_address_from_request)
+    customer_address = to_checksum_address(customer_address_from_request)
 
     if not order.customer_address:
         order.customer_address = customer_address
         database.session.commit()
 
+    # Contract may still be deployed in the background
+    if order.contract_status == "PENDING":
+        return jsonify(message="Contract deployment pending."), 400
+
+    if order.contract_status == "FAILED":
+        return jsonify(message="Contract deployment failed."), 400
+
     # Get optional amount parameter from query string
     amount_param = request.args.get("amount", None)
 
     try:
-        abi = json.loads(read_file("./blockchain/output/OrderPayment.abi"))
-        contract = web3.eth.contract(address=order.contract_address, abi=abi)
+        contract = get_order_contract(order)
 
         # Check if already fully paid
-        is_paid = contract.functions.isPaid().call()
+        is_paid = contract.is_paid()
         if is_paid:
             return jsonify(message="Transfer already complete."), 400
 
         # Get current payment status
         order_price_wei = int(order.price * 100)
-        amount_paid = contract.functions.getAmountPaid().call()
+        amount_paid = contract.get_amount_paid()
         remaining_amount = order_price_wei - amount_paid
 
         # Determine payment amount
@@ -351,12 +1027,13 @@ def generate_invoice():
             payment_amount = remaining_amount
 
         # Generate payment transaction with the calculated payment_amount
-        transaction = contract.functions.pay().build_transaction({
+        pay_call = contract.pay()
+        transaction = pay_call.build_transaction({
             'from': customer_address,
             'value': payment_amount,  # THIS IS THE KEY LINE - use payment_amount not order_price_wei
             'nonce': web3.eth.get_transaction_count(customer_address),
-            'gas': 200000,
-            'gasPrice': web3.eth.gas_price
+            'gas': contract.estimate_gas(pay_call, {'from': customer_address, 'value': payment_amount}),
+            **gas_oracle.fees()
         })
 
         invoice = dict(transaction)
@@ -460,27 +1137,26 @@ def confirm_delivery():
     # Verify payment and courier assignment via smart contract
     web3 = get_web3()
     try:
-        abi = json.loads(read_file("./blockchain/output/OrderPayment.abi"))
-        contract = web3.eth.contract(address=order.contract_address, abi=abi)
+        contract = get_order_contract(order)
 
         # Check if courier is assigned
-        courier_address = contract.functions.courier_address().call()
-        zero_address = "0x0000000000000000000000000000000000000000"
+        courier_address = contract.get_courier_address()
 
-        if courier_address.lower() == zero_address.lower():
+        if courier_address.lower() == ZERO_ADDRESS.lower():
             return jsonify(message="Delivery not complete."), 400
 
         # Confirm delivery on blockchain (releases funds from escrow)
         owner_address, owner_private_key = get_owner_account()
 
         # Build transaction from customer's address
-        customer_address = web3.to_checksum_address(order.customer_address)
+        customer_address = to_checksum_address(order.customer_address)
 
-        confirm_txn = contract.functions.confirmDelivery().build_transaction({
+        confirm_call = contract.confirm_delivery()
+        confirm_txn = confirm_call.build_transaction({
             'from': customer_address,
             'nonce': web3.eth.get_transaction_count(customer_address),
-            'gas': 200000,
-            'gasPrice': web3.eth.gas_price
+            'gas': contract.estimate_gas(confirm_call, {'from': customer_address}),
+            **gas_oracle.fees()
         })
 
         # Note: In a real scenario, the customer would sign this transaction
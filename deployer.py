@@ -0,0 +1,71 @@
+import threading
+
+from contracts import deploy_order_contracts, order_contract_name
+from models import database, Order
+
+
+class ContractDeployer(threading.Thread):
+    """
+    Background worker deploying contracts of orders created with a PENDING contract status.
+    Orders are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so deployers in
+    several processes or replicas never deploy the same order twice.
+    With batch_size > 1 up to batch_size orders are claimed and created by one transaction.
+    """
+
+    def __init__(self, application, poll_interval, max_attempts, batch_size=1):
+        super().__init__(name="contract-deployer", daemon=True)
+        self.application = application
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self._wakeup = threading.Event()
+
+    def notify(self):
+        """Wake the deployer up, called after an order with a pending contract is committed"""
+        self._wakeup.set()
+
+    def run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+            try:
+                with self.application.app_context():
+                    while self.deploy_next():
+                        pass
+            except Exception as e:
+                print(f"Warning: contract deployer failed: {str(e)}")
+
+    def deploy_next(self):
+        """Deploy contracts of the oldest pending orders, returns False when there is nothing to do"""
+        orders = Order.query.filter(
+            Order.contract_status == "PENDING"
+        ).order_by(
+            Order.id.asc()
+        ).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+        if not orders:
+            database.session.rollback()
+            return False
+
+        try:
+            addresses = deploy_order_contracts([
+                (order.id, order.customer_address, order.price) for order in orders
+            ])
+            for order, address in zip(orders, addresses):
+                order.contract_address = address
+                order.contract_name = order_contract_name()
+                order.contract_status = "DEPLOYED"
+            deployed = True
+        except Exception as e:
+            for order in orders:
+                order.contract_attempts += 1
+                if order.contract_attempts >= self.max_attempts:
+                    order.contract_status = "FAILED"
+            print(f"Warning: contract deployment for orders {[order.id for order in orders]} failed: {str(e)}")
+            deployed = False
+
+        database.session.commit()
+
+        # back off until the next poll after a failure
+        return deployed
@@ -0,0 +1,204 @@
+import re
+import threading
+from itertools import combinations
+
+from configuration import FUZZY_MAX_DISTANCE
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split text into lower case word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def edit_distance(first, second, max_distance):
+    """
+    Optimal string alignment distance (Levenshtein with adjacent transpositions).
+    Returns max_distance + 1 as soon as the distance is known to exceed max_distance.
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(second) + 1))
+
+    for i in range(1, len(first) + 1):
+        current = [i] + [0] * len(second)
+        row_minimum = i
+
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+
+            if (previous_previous is not None and j > 1
+                    and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]):
+                value = min(value, previous_previous[j - 2] + 1)
+
+            current[j] = value
+            row_minimum = min(row_minimum, value)
+
+        if row_minimum > max_distance:
+            return max_distance + 1
+
+        previous_previous, previous = previous, current
+
+    return previous[-1]
+
+
+def term_max_distance(term, max_distance):
+    """
+    Largest edit distance allowed for a query term, short terms would match almost anything:
+    0 up to 2 characters, 1 up to 5 characters, max_distance above.
+    """
+    if len(term) <= 2:
+        return 0
+    if len(term) <= 5:
+        return min(1, max_distance)
+    return max_distance
+
+
+def deletes(word, max_distance):
+    """Get all strings obtained by removing up to max_distance characters from word"""
+    result = {word}
+    for count in range(1, min(max_distance, len(word)) + 1):
+        for positions in combinations(range(len(word)), count):
+            result.add("".join(char for index, char in enumerate(word) if index not in positions))
+    return result
+
+
+class FuzzyIndex:
+    """
+    SymSpell style deletion dictionary over product name tokens.
+    Every token is indexed under the strings obtained by deleting up to max_distance characters
+    from its first prefix_length characters, so a misspelled term is found by generating
+    its own deletes and verifying the few candidates that share one.
+    """
+
+    def __init__(self, names, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+
+        # token -> positions of names containing it
+        self.postings = {}
+        for position, name in enumerate(names):
+            for token in set(tokenize(name)):
+                self.postings.setdefault(token, []).append(position)
+
+        # delete -> tokens
+        self.deletes = {}
+        for token in self.postings:
+            for delete in deletes(token[:prefix_length], max_distance):
+                self.deletes.setdefault(delete, []).append(token)
+
+    def lookup(self, term, max_distance):
+        """Get indexed tokens within max_distance of term, as token -> distance"""
+        max_distance = min(max_distance, self.max_distance)
+
+        candidates = set()
+        for delete in deletes(term[:self.prefix_length], max_distance):
+            candidates.update(self.deletes.get(delete, ()))
+
+        matches = {}
+        for token in candidates:
+            distance = edit_distance(term, token, max_distance)
+            if distance <= max_distance:
+                matches[token] = distance
+        return matches
+
+    def search(self, query, max_distance):
+        """
+        Get (position, distance) pairs of names matching every query token, best first.
+        Each token may be at most term_max_distance(token, max_distance) edits away.
+        Distance of a name is the sum of the distances of its closest tokens.
+        """
+        scores = None
+
+        for term in tokenize(query):
+            term_distance = term_max_distance(term, max_distance)
+
+            term_scores = {}
+            for token, distance in self.lookup(term, term_distance).items():
+                for position in self.postings[token]:
+                    if distance < term_scores.get(position, term_distance + 1):
+                        term_scores[position] = distance
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    position: score + term_scores[position]
+                    for position, score in scores.items() if position in term_scores
+                }
+
+            if not scores:
+                return []
+
+        if scores is None:
+            return []
+
+        return sorted(scores.items(), key=lambda item: (item[1], item[0]))
+
+
+def build_fuzzy_index(snapshot):
+    """Build fuzzy index over product names of a catalog snapshot"""
+    return FuzzyIndex([name for _, name, _ in snapshot.products], FUZZY_MAX_DISTANCE)
+
+
+class FuzzyIndexBuilder:
+    """
+    Fuzzy index of the newest catalog snapshot, built on a background thread.
+    Building takes seconds on large catalogs (about 11 s per 100k names), so after a catalog change
+    searches keep using the index of the previous snapshot until the new one is ready,
+    and no index is available at all until the first one is built.
+    """
+
+    def __init__(self):
+        self._current = None  # (snapshot, index)
+        self._latest = None  # newest snapshot asked for
+        self._running = False
+        self._lock = threading.Lock()
+
+    def get(self, snapshot):
+        """
+        Get (snapshot, index) of the newest built snapshot, or None before the first index is built.
+        Starts a build when snapshot is newer.
+        """
+        current = self._current
+        if current is None or current[0].version < snapshot.version:
+            self._schedule(snapshot)
+        return current
+
+    def _schedule(self, snapshot):
+        with self._lock:
+            if self._latest is not None and self._latest.version >= snapshot.version:
+                return
+            self._latest = snapshot
+            if self._running:
+                return
+            self._running = True
+
+        threading.Thread(target=self._run, name="fuzzy-index", daemon=True).start()
+
+    def _run(self):
+        """Build indexes until the newest requested snapshot is indexed"""
+        while True:
+            with self._lock:
+                snapshot = self._latest
+                if self._current is not None and self._current[0].version >= snapshot.version:
+                    self._running = False
+                    return
+
+            try:
+                index = build_fuzzy_index(snapshot)
+            except Exception as e:
+                print(f"Warning: fuzzy index of catalog version {snapshot.version} failed: {str(e)}")
+                with self._lock:
+                    # the next search asks again
+                    self._latest = self._current[0] if self._current is not None else None
+                    self._running = False
+                return
+
+            with self._lock:
+                if self._current is None or self._current[0].version < snapshot.version:
+                    self._current = (snapshot, index)
@@ -0,0 +1,206 @@
+import threading
+import time
+
+from configuration import GAS_FEE_MODE, GAS_ORACLE_INTERVAL, GAS_ORACLE_MAX_AGE, GAS_FEE_BUMP_PERCENT
+from configuration import GAS_LIMIT_MARGIN_PERCENT, GAS_ESTIMATE_TTL
+from utilities import get_web3
+
+# Blocks and reward percentile of eth_feeHistory used for the priority fee
+FEE_HISTORY_BLOCKS = 10
+FEE_HISTORY_PERCENTILE = 50
+
+# JSON-RPC "method not found" and how nodes phrase unsupported methods (eth-tester: "has not been implemented")
+METHOD_NOT_FOUND = -32601
+UNSUPPORTED_METHOD_MESSAGES = ("method not found", "not implemented", "not been implemented", "not supported", "does not exist", "not available")
+
+
+class FeeHistoryUnsupported(Exception):
+    """The node has no eth_feeHistory or returns no base fees, i.e. it predates EIP-1559"""
+
+
+def is_unsupported_method(error):
+    """Whether an RPC error says the method does not exist on the node"""
+    if isinstance(error, NotImplementedError):
+        return True
+
+    details = error.args[0] if error.args else None
+    if isinstance(details, dict):
+        if details.get("code") == METHOD_NOT_FOUND:
+            return True
+        details = details.get("message")
+
+    message = str(details if details is not None else error).lower()
+    return any(text in message for text in UNSUPPORTED_METHOD_MESSAGES)
+
+
+class GasOracle(threading.Thread):
+    """
+    Fee fields for transaction builders, refreshed in the background every `interval` seconds,
+    so building a transaction does not need a gas price RPC.
+    In "eip1559" mode fees come from eth_feeHistory (maxFeePerGas / maxPriorityFeePerGas),
+    in "legacy" mode from eth_gasPrice, "auto" uses eip1559 when the node supports it.
+    Fees older than `max_age` seconds are refreshed inline before they are handed out.
+    """
+
+    def __init__(self, mode, interval, max_age, bump_percent):
+        super().__init__(name="gas-oracle", daemon=True)
+        self.mode = mode
+        self.interval = interval
+        self.max_age = max_age
+        self.bump_percent = bump_percent
+        self._fees = None
+        self._updated_at = 0.0
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Warning: gas oracle refresh failed: {str(e)}")
+
+    def _fee_history(self, web3):
+        """EIP-1559 fees, base fee of the next block doubled so it survives several full blocks"""
+        try:
+            history = web3.eth.fee_history(FEE_HISTORY_BLOCKS, "latest", [FEE_HISTORY_PERCENTILE])
+        except Exception as e:
+            if is_unsupported_method(e):
+                raise FeeHistoryUnsupported(str(e)) from e
+            raise
+
+        base_fees = history.get("baseFeePerGas")
+        if not base_fees or base_fees[-1] is None:
+            raise FeeHistoryUnsupported("Node returned no baseFeePerGas")
+
+        base_fee = base_fees[-1]
+        rewards = sorted(reward[0] for reward in history.get("reward", []) if reward)
+        priority_fee = rewards[len(rewards) // 2] if rewards else web3.eth.max_priority_fee
+
+        return {
+            "maxFeePerGas": 2 * base_fee + priority_fee,
+            "maxPriorityFeePerGas": priority_fee
+        }
+
+    def refresh(self):
+        """Fetch current fees from the node"""
+        web3 = get_web3()
+
+        if self.mode == "legacy":
+            fees = {"gasPrice": web3.eth.gas_price}
+        elif self.mode == "eip1559":
+            fees = self._fee_history(web3)
+        else:
+            try:
+                fees = self._fee_history(web3)
+            except FeeHistoryUnsupported:
+                # pre-London node without base fees, stay on legacy pricing
+                # other errors (timeouts, connection resets) keep auto mode and are raised
+                self.mode = "legacy"
+                fees = {"gasPrice": web3.eth.gas_price}
+
+        with self._lock:
+            self._fees = fees
+            self._updated_at = time.monotonic()
+
+        return fees
+
+    def fees(self):
+        """Get fee fields to merge into a transaction dict"""
+        self._start()
+
+        with self._lock:
+            fees = self._fees
+            fresh = time.monotonic() - self._updated_at <= self.max_age
+
+        if fees is None or not fresh:
+            fees = self.refresh()
+
+        return dict(fees)
+
+    def bump(self, transaction, times=1):
+        """Raise fee fields of a transaction by bump_percent per time, e.g. to replace an underpriced one"""
+        factor = (100 + self.bump_percent) ** times
+        divisor = 100 ** times
+
+        for field in ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas"):
+            if field in transaction:
+                transaction[field] = -(-transaction[field] * factor // divisor)
+
+        return transaction
+
+    def _start(self):
+        """Start background refreshes on first use"""
+        if self.is_alive():
+            return
+
+        with self._start_lock:
+            if not self.is_alive():
+                self.start()
+
+
+class GasEstimator:
+    """
+    Gas limits of contract calls, estimated by the node on a real call and cached under a key
+    holding the contract's bytecode hash, so a recompiled contract is estimated again.
+    Limits are the estimate plus margin_percent and are re-estimated after ttl seconds.
+    Gas used depends on contract state (e.g. the first installment writes a fresh storage slot),
+    so a re-estimate only ever raises the limit of a key.
+    """
+
+    def __init__(self, margin_percent, ttl):
+        self.margin_percent = margin_percent
+        self.ttl = ttl
+        self.estimates = 0
+        self.failures = 0
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def gas_limit(self, key, estimate, default):
+        """
+        Get gas limit of key, estimate() asks the node for the gas used.
+        When the node cannot estimate (e.g. the call would revert) the last known limit,
+        or default, is returned and nothing is cached.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._limits.get(key)
+
+        if cached and now - cached[1] <= self.ttl:
+            return cached[0]
+
+        try:
+            gas = estimate()
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            return cached[0] if cached else default
+
+        limit = gas * (100 + self.margin_percent) // 100
+        if cached:
+            limit = max(limit, cached[0])
+
+        with self._lock:
+            self.estimates += 1
+            self._limits[key] = (limit, now)
+
+        return limit
+
+    def stats(self):
+        """Get cached limits and estimation counters"""
+        with self._lock:
+            return {
+                "size": len(self._limits),
+                "estimates": self.estimates,
+                "failures": self.failures
+            }
+
+
+# Fees of every transaction built by this process
+gas_oracle = GasOracle(GAS_FEE_MODE, GAS_ORACLE_INTERVAL, GAS_ORACLE_MAX_AGE, GAS_FEE_BUMP_PERCENT)
+
+# Gas limits of every transaction built by this process
+gas_estimator = GasEstimator(GAS_LIMIT_MARGIN_PERCENT, GAS_ESTIMATE_TTL)
@@ -0,0 +1,111 @@
+import datetime
+import threading
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.exc import IntegrityError
+
+from models import database, IdempotencyKey
+
+
+class IdempotencyStore:
+    """
+    Remembers which order an Idempotency-Key of a customer created.
+    A key is claimed IN_PROGRESS before the order is placed (expires after lock_timeout,
+    so a crashed request does not block the key forever) and COMPLETED with the order id
+    afterwards (expires after ttl). Claims run on their own connection, so they are visible
+    to concurrent retries before the caller's order transaction commits, completion is part
+    of the order transaction, so a stored order always completes its key.
+    """
+
+    def __init__(self, ttl, lock_timeout, purge_interval=60.0):
+        self.ttl = datetime.timedelta(seconds=ttl)
+        self.lock_timeout = datetime.timedelta(seconds=lock_timeout)
+        self.purge_interval = datetime.timedelta(seconds=purge_interval)
+        self._purged_at = None
+        self._lock = threading.Lock()
+
+    def _purge(self, connection, now):
+        """Delete expired keys, at most once per purge_interval per process"""
+        with self._lock:
+            if self._purged_at and now - self._purged_at < self.purge_interval:
+                return
+            self._purged_at = now
+
+        connection.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+
+    def claim(self, customer_email, key, request_hash):
+        """
+        Claim key for a new request.
+        Returns None when the caller now owns the key, otherwise the existing
+        IdempotencyKey row (request_hash, state and order_id of the earlier request).
+        """
+        now = datetime.datetime.utcnow()
+        where = (
+            IdempotencyKey.customer_email == customer_email,
+            IdempotencyKey.idempotency_key == key
+        )
+
+        claim = {
+            "request_hash": request_hash,
+            "state": "IN_PROGRESS",
+            "order_id": None,
+            "expires_at": now + self.lock_timeout
+        }
+
+        with database.engine.begin() as connection:
+            self._purge(connection, now)
+
+            try:
+                with connection.begin_nested():
+                    connection.execute(IdempotencyKey.__table__.insert().values(
+                        customer_email=customer_email,
+                        idempotency_key=key,
+                        **claim
+                    ))
+                return None
+            except IntegrityError:
+                pass  # key is used already
+
+            existing = connection.execute(select(IdempotencyKey).where(*where).with_for_update()).first()
+
+            if existing is None:
+                # purged by another process in the meantime
+                connection.execute(IdempotencyKey.__table__.insert().values(
+                    customer_email=customer_email,
+                    idempotency_key=key,
+                    **claim
+                ))
+                return None
+
+            if existing.expires_at >= now:
+                return existing
+
+            # expired, take the key over
+            connection.execute(update(IdempotencyKey).where(*where).values(**claim))
+            return None
+
+    def complete(self, session, customer_email, key, order_id):
+        """
+        Store the order created for key, repeated requests get it until the key expires.
+        Runs in session, the caller commits it together with the order.
+        """
+        session.execute(
+            update(IdempotencyKey).where(
+                IdempotencyKey.customer_email == customer_email,
+                IdempotencyKey.idempotency_key == key
+            ).values(
+                state="COMPLETED",
+                order_id=order_id,
+                expires_at=datetime.datetime.utcnow() + self.ttl
+            )
+        )
+
+    def release(self, customer_email, key):
+        """Forget key of a request that created no order, so it can be retried"""
+        with database.engine.begin() as connection:
+            connection.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.customer_email == customer_email,
+                    IdempotencyKey.idempotency_key == key
+                )
+            )
@@ -16,7 +16,8 @@ CREATE TABLE users (
 CREATE TABLE products (
     id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(256) NOT NULL UNIQUE,
-    price DECIMAL(10, 2) NOT NULL
+    price DECIMAL(10, 2) NOT NULL,
+    INDEX products_price_id (price, id)
 );
 
 -- CATEGORIES table
@@ -35,6 +36,67 @@ CREATE TABLE product_categories (
     UNIQUE KEY unique_product_category (product_id, category_id)
 );
 
+-- Catalog version, bumped on every catalog change so caches can be invalidated
+CREATE TABLE catalog_version (
+    id INT NOT NULL PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0
+);
+
+INSERT INTO catalog_version (id, version) VALUES (1, 0);
+
+-- Change log of the catalog, one row per product or category touched by a version
+CREATE TABLE catalog_changes (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    version INT NOT NULL,
+    entity ENUM('product', 'category') NOT NULL,
+    entity_id INT NOT NULL,
+    INDEX catalog_changes_version (version)
+);
+
+-- Shared nonce sequence of accounts signing from several processes
+CREATE TABLE nonce_sequences (
+    address VARCHAR(64) NOT NULL PRIMARY KEY,
+    next_nonce INT NOT NULL
+);
+
+-- Nonces handed out but not yet mined, expired leases are handed out again
+CREATE TABLE nonce_leases (
+    address VARCHAR(64) NOT NULL,
+    nonce INT NOT NULL,
+    state ENUM('LEASED', 'SENT') NOT NULL,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (address, nonce)
+);
+
+-- Pre-deployed OrderPaymentPooled contracts, claimed by new orders in CONTRACT_MODE=pool.
+-- Contracts that were initialized for an order that failed are kept as FAILED
+CREATE TABLE escrow_pool (
+    address VARCHAR(64) NOT NULL PRIMARY KEY,
+    state ENUM('AVAILABLE', 'CLAIMED', 'FAILED') NOT NULL DEFAULT 'AVAILABLE',
+    deployed_at DATETIME NOT NULL,
+    claimed_at DATETIME DEFAULT NULL,
+    INDEX escrow_pool_state (state, deployed_at)
+);
+
+-- One row per background job that must run in a single process at a time, locked while it runs
+CREATE TABLE worker_locks (
+    name VARCHAR(64) NOT NULL PRIMARY KEY
+);
+
+INSERT INTO worker_locks (name) VALUES ('escrow_provisioner');
+
+-- Results of /order requests per Idempotency-Key, expired keys are purged and may be reused
+CREATE TABLE idempotency_keys (
+    customer_email VARCHAR(256) NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    state ENUM('IN_PROGRESS', 'COMPLETED') NOT NULL,
+    order_id INT DEFAULT NULL,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (customer_email, idempotency_key),
+    INDEX idempotency_keys_expires_at (expires_at)
+);
+
 CREATE TABLE orders (
     id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
     customer_id INT NOT NULL,
@@ -42,8 +104,12 @@ CREATE TABLE orders (
     status ENUM('CREATED', 'PENDING', 'COMPLETE') NOT NULL DEFAULT 'CREATED',
     timestamp DATETIME NOT NULL,
     contract_address varchar(64) DEFAULT NULL,
+    contract_name varchar(32) DEFAULT NULL,
     customer_address varchar(64) DEFAULT NULL,
-    FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE CASCADE
+    contract_status ENUM('PENDING', 'DEPLOYED', 'FAILED') NOT NULL DEFAULT 'PENDING',
+    contract_attempts INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX orders_contract_status (contract_status, id)
 );
 
 -- Many-to-many relationship: orders and products
@@ -31,10 +31,14 @@ class User(database.Model):
 # CREATE TABLE products (
 #     id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
 #     name VARCHAR(256) NOT NULL UNIQUE,
-#     price DECIMAL(10, 2) NOT NULL
+#     price DECIMAL(10, 2) NOT NULL,
+#     INDEX products_price_id (price, id)
 # );
 class Product(database.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        database.Index("products_price_id", "price", "id"),
+    )
 
     id = database.Column(database.Integer, primary_key=True)
     name = database.Column(database.String(256), nullable=False, unique=True)
@@ -85,6 +89,142 @@ class ProductCategory(database.Model):
     category_id = database.Column(database.Integer, database.ForeignKey('categories.id'), nullable=False)
 
 
+# -- Catalog version, bumped on every catalog change so caches can be invalidated
+# CREATE TABLE catalog_version (
+#     id INT NOT NULL PRIMARY KEY,
+#     version INT NOT NULL DEFAULT 0
+# );
+class CatalogVersion(database.Model):
+    __tablename__ = "catalog_version"
+
+    id = database.Column(database.Integer, primary_key=True)
+    version = database.Column(database.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CatalogVersion {self.version}>"
+
+
+# -- Change log of the catalog, one row per product or category touched by a version
+# CREATE TABLE catalog_changes (
+#     id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+#     version INT NOT NULL,
+#     entity ENUM('product', 'category') NOT NULL,
+#     entity_id INT NOT NULL,
+#     INDEX catalog_changes_version (version)
+# );
+class CatalogChange(database.Model):
+    __tablename__ = "catalog_changes"
+
+    id = database.Column(database.Integer, primary_key=True)
+    version = database.Column(database.Integer, nullable=False, index=True)
+    entity = database.Column(database.Enum('product', 'category'), nullable=False)
+    entity_id = database.Column(database.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<CatalogChange {self.version} {self.entity} {self.entity_id}>"
+
+
+# -- Shared nonce sequence of accounts signing from several processes
+# CREATE TABLE nonce_sequences (
+#     address VARCHAR(64) NOT NULL PRIMARY KEY,
+#     next_nonce INT NOT NULL
+# );
+class NonceSequence(database.Model):
+    __tablename__ = "nonce_sequences"
+
+    address = database.Column(database.String(64), primary_key=True)
+    next_nonce = database.Column(database.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<NonceSequence {self.address} next={self.next_nonce}>"
+
+
+# -- Nonces handed out but not yet mined, expired leases are handed out again
+# CREATE TABLE nonce_leases (
+#     address VARCHAR(64) NOT NULL,
+#     nonce INT NOT NULL,
+#     state ENUM('LEASED', 'SENT') NOT NULL,
+#     expires_at DATETIME NOT NULL,
+#     PRIMARY KEY (address, nonce)
+# );
+class NonceLease(database.Model):
+    __tablename__ = "nonce_leases"
+
+    address = database.Column(database.String(64), primary_key=True)
+    nonce = database.Column(database.Integer, primary_key=True, autoincrement=False)
+    state = database.Column(database.Enum('LEASED', 'SENT'), nullable=False)
+    expires_at = database.Column(database.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<NonceLease {self.address} {self.nonce} {self.state}>"
+
+
+# -- Pre-deployed OrderPaymentPooled contracts, claimed by new orders in CONTRACT_MODE=pool.
+# -- Contracts that were initialized for an order that failed are kept as FAILED
+# CREATE TABLE escrow_pool (
+#     address VARCHAR(64) NOT NULL PRIMARY KEY,
+#     state ENUM('AVAILABLE', 'CLAIMED', 'FAILED') NOT NULL DEFAULT 'AVAILABLE',
+#     deployed_at DATETIME NOT NULL,
+#     claimed_at DATETIME DEFAULT NULL,
+#     INDEX escrow_pool_state (state, deployed_at)
+# );
+class PooledContract(database.Model):
+    __tablename__ = "escrow_pool"
+    __table_args__ = (
+        database.Index("escrow_pool_state", "state", "deployed_at"),
+    )
+
+    address = database.Column(database.String(64), primary_key=True)
+    state = database.Column(database.Enum('AVAILABLE', 'CLAIMED', 'FAILED'), nullable=False, default='AVAILABLE')
+    deployed_at = database.Column(database.DateTime, nullable=False)
+    claimed_at = database.Column(database.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<PooledContract {self.address} {self.state}>"
+
+
+# -- One row per background job that must run in a single process at a time, locked while it runs
+# CREATE TABLE worker_locks (
+#     name VARCHAR(64) NOT NULL PRIMARY KEY
+# );
+# INSERT INTO worker_locks (name) VALUES ('escrow_provisioner');
+class WorkerLock(database.Model):
+    __tablename__ = "worker_locks"
+
+    name = database.Column(database.String(64), primary_key=True)
+
+    def __repr__(self):
+        return f"<WorkerLock {self.name}>"
+
+
+# -- Results of /order requests per Idempotency-Key, expired keys are purged and may be reused
+# CREATE TABLE idempotency_keys (
+#     customer_email VARCHAR(256) NOT NULL,
+#     idempotency_key VARCHAR(255) NOT NULL,
+#     request_hash CHAR(64) NOT NULL,
+#     state ENUM('IN_PROGRESS', 'COMPLETED') NOT NULL,
+#     order_id INT DEFAULT NULL,
+#     expires_at DATETIME NOT NULL,
+#     PRIMARY KEY (customer_email, idempotency_key),
+#     INDEX idempotency_keys_expires_at (expires_at)
+# );
+class IdempotencyKey(database.Model):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        database.Index("idempotency_keys_expires_at", "expires_at"),
+    )
+
+    customer_email = database.Column(database.String(256), primary_key=True)
+    idempotency_key = database.Column(database.String(255), primary_key=True)
+    request_hash = database.Column(database.String(64), nullable=False)
+    state = database.Column(database.Enum('IN_PROGRESS', 'COMPLETED'), nullable=False)
+    order_id = database.Column(database.Integer, nullable=True)
+    expires_at = database.Column(database.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<IdempotencyKey {self.customer_email} {self.idempotency_key} {self.state}>"
+
+
 # CREATE TABLE orders (
 #     id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
 #     customer_id INT NOT NULL,
@@ -92,19 +232,29 @@ class ProductCategory(database.Model):
 #     status ENUM('CREATED', 'PENDING', 'COMPLETE') NOT NULL DEFAULT 'CREATED',
 #     timestamp DATETIME NOT NULL,
 #     contract_address varchar(64) DEFAULT NULL,
+#     contract_name varchar(32) DEFAULT NULL,
 #     customer_address varchar(64) DEFAULT NULL,
-#     FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE CASCADE
+#     contract_status ENUM('PENDING', 'DEPLOYED', 'FAILED') NOT NULL DEFAULT 'PENDING',
+#     contract_attempts INT NOT NULL DEFAULT 0,
+#     FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE CASCADE,
+#     INDEX orders_contract_status (contract_status, id)
 # );
 
 class Order(database.Model):
     __tablename__ = "orders"
+    __table_args__ = (
+        database.Index("orders_contract_status", "contract_status", "id"),
+    )
     id = database.Column(database.Integer, primary_key=True)
     customer_id = database.Column(database.Integer, database.ForeignKey('users.id'), nullable=False)
     price = database.Column(database.Numeric(10, 2), nullable=False)
     status = database.Column(database.Enum('CREATED', 'PENDING', 'COMPLETE'), nullable=False, default='CREATED')
     timestamp = database.Column(database.DateTime, nullable=False, default=datetime.utcnow)
     contract_address = database.Column(database.String(64), nullable=True)
+    contract_name = database.Column(database.String(32), nullable=True)  # artifact that created the contract
     customer_address = database.Column(database.String(64), nullable=True)
+    contract_status = database.Column(database.Enum('PENDING', 'DEPLOYED', 'FAILED'), nullable=False, default='PENDING')
+    contract_attempts = database.Column(database.Integer, nullable=False, default=0)
 
     # Relationships
     customer = database.relationship("User", back_populates="orders")
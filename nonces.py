@@ -0,0 +1,291 @@
+import datetime
+import threading
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from configuration import NONCE_BACKEND, NONCE_LEASE_TIMEOUT, NONCE_DROP_TIMEOUT
+from gas import gas_oracle
+from models import database, NonceSequence, NonceLease
+from receipts import receipt_tracker, DROPPED
+from utilities import get_web3, submit_transaction
+
+# Node error messages meaning the nonce we used does not match the account state
+NONCE_ERRORS = (
+    "nonce too low",
+    "nonce too high",
+    "replacement transaction underpriced",
+    "already known",
+    "known transaction",
+    "correct nonce"
+)
+
+# Attempts to create a missing nonce_sequences row when concurrent creations deadlock
+SEQUENCE_CREATE_ATTEMPTS = 3
+
+
+def is_nonce_error(error):
+    """Check if a send error was caused by a stale or duplicate nonce"""
+    message = str(error).lower()
+    return any(text in message for text in NONCE_ERRORS)
+
+
+def get_pending_nonce(address):
+    """Get next nonce of address according to the chain, including pending transactions"""
+    return get_web3().eth.get_transaction_count(address, "pending")
+
+
+class NonceManager:
+    """
+    Hands out sequential nonces per account from memory, so several transactions
+    of the same account can be in flight at once.
+    The counter is (re)synced from the chain's pending transaction count on first use
+    and after any failed send, which also fills gaps left by dropped transactions.
+    """
+
+    def __init__(self):
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def allocate(self, address):
+        """Get next nonce of address"""
+        with self._lock:
+            if address not in self._next:
+                self._next[address] = get_pending_nonce(address)
+
+            nonce = self._next[address]
+            self._next[address] = nonce + 1
+            return nonce
+
+    def release(self, address, nonce):
+        """Give back a nonce whose transaction was never sent"""
+        with self._lock:
+            if self._next.get(address) == nonce + 1:
+                self._next[address] = nonce
+            else:
+                # later nonces are already handed out, resync to fill the gap
+                self._next.pop(address, None)
+
+    def reset(self, address):
+        """Forget local state of address, next allocation resyncs from the chain"""
+        with self._lock:
+            self._next.pop(address, None)
+
+    def mark_sent(self, address, nonce):
+        """Record that the transaction using nonce was accepted by the node"""
+
+    def confirm(self, address, nonce):
+        """Record that the transaction using nonce was mined"""
+
+    def submit_transaction(self, address, private_key, build_transaction, callback=None, retries=3):
+        """
+        Build transaction with a fresh nonce, sign and send it, returns the transaction hash without waiting.
+        build_transaction(nonce) returns the transaction dict.
+        Sends rejected because of the nonce are retried with a resynced nonce and bumped fees,
+        so a retry can also replace an underpriced transaction.
+        The receipt tracker confirms the nonce once the transaction is mined, then calls callback(status, receipt).
+        """
+        for attempt in range(retries):
+            nonce = self.allocate(address)
+
+            try:
+                transaction = gas_oracle.bump(build_transaction(nonce), attempt)
+                transaction_hash = submit_transaction(transaction, private_key)
+            except Exception as e:
+                self.release(address, nonce)
+                if is_nonce_error(e):
+                    self.reset(address)
+                    if attempt + 1 < retries:
+                        continue
+                raise
+
+            self.mark_sent(address, nonce)
+
+            def finished(status, receipt):
+                if status == DROPPED:
+                    # the transaction may have been dropped, resync before the next allocation
+                    self.reset(address)
+                else:
+                    self.confirm(address, nonce)
+
+                if callback is not None:
+                    callback(status, receipt)
+
+            return receipt_tracker.track(transaction_hash, finished)
+
+    def send_transaction(self, address, private_key, build_transaction, retries=3):
+        """Like submit_transaction, but wait for the receipt"""
+        transaction_hash = self.submit_transaction(address, private_key, build_transaction, retries=retries)
+        return receipt_tracker.wait(transaction_hash)
+
+
+class DatabaseNonceManager(NonceManager):
+    """
+    Nonce sequence shared by every process and replica through the nonce_sequences row of the account.
+    Each handed out nonce is leased in nonce_leases until its transaction is mined.
+    Leases that are never sent (NONCE_LEASE_TIMEOUT) or never mined (NONCE_DROP_TIMEOUT) expire,
+    and expired nonces are handed out again before new ones, which repairs gaps.
+    Runs on its own connection, so the caller's session and transaction are not touched.
+    """
+
+    def __init__(self, lease_timeout, drop_timeout):
+        super().__init__()
+        self.lease_timeout = datetime.timedelta(seconds=lease_timeout)
+        self.drop_timeout = datetime.timedelta(seconds=drop_timeout)
+        self._sequences = set()  # addresses whose sequence row exists
+
+    def _create_sequence(self, address):
+        """
+        Create sequence row of address from the chain unless it exists, in its own transaction.
+        Creating it after a SELECT ... FOR UPDATE that found no row lets concurrent processes deadlock
+        on the gap lock, so the row is created before any lock is taken.
+        """
+        if address in self._sequences:
+            return
+
+        query = select(NonceSequence.address).where(NonceSequence.address == address)
+
+        for attempt in range(SEQUENCE_CREATE_ATTEMPTS):
+            try:
+                with database.engine.begin() as connection:
+                    if connection.execute(query).scalar() is None:
+                        connection.execute(NonceSequence.__table__.insert().values(
+                            address=address,
+                            next_nonce=get_pending_nonce(address)
+                        ))
+                break
+            except IntegrityError:
+                break  # created by another process in the meantime
+            except OperationalError:
+                # deadlock of concurrent inserts, the transaction was rolled back
+                if attempt + 1 == SEQUENCE_CREATE_ATTEMPTS:
+                    raise
+
+        self._sequences.add(address)
+
+    def _lock_sequence(self, connection, address):
+        """Lock sequence row of address and get its next nonce, the row is created by _create_sequence"""
+        next_nonce = connection.execute(
+            select(NonceSequence.next_nonce).where(NonceSequence.address == address).with_for_update()
+        ).scalar()
+
+        if next_nonce is None:
+            # row was deleted, create it again on the next call
+            self._sequences.discard(address)
+            raise Exception(f"Nonce sequence of {address} is missing")
+
+        return next_nonce
+
+    def allocate(self, address):
+        """Get next nonce of address, reusing the lowest expired lease first"""
+        self._create_sequence(address)
+        now = datetime.datetime.utcnow()
+
+        with database.engine.begin() as connection:
+            next_nonce = self._lock_sequence(connection, address)
+
+            expired = connection.execute(
+                select(NonceLease.nonce).where(
+                    NonceLease.address == address,
+                    NonceLease.expires_at < now
+                ).order_by(NonceLease.nonce).limit(1)
+            ).scalar()
+
+            if expired is not None:
+                connection.execute(
+                    update(NonceLease).where(
+                        NonceLease.address == address,
+                        NonceLease.nonce == expired
+                    ).values(state="LEASED", expires_at=now + self.lease_timeout)
+                )
+                return expired
+
+            connection.execute(
+                update(NonceSequence).where(
+                    NonceSequence.address == address
+                ).values(next_nonce=next_nonce + 1)
+            )
+            connection.execute(NonceLease.__table__.insert().values(
+                address=address,
+                nonce=next_nonce,
+                state="LEASED",
+                expires_at=now + self.lease_timeout
+            ))
+            return next_nonce
+
+    def _set_lease(self, address, nonce, **values):
+        with database.engine.begin() as connection:
+            connection.execute(
+                update(NonceLease).where(
+                    NonceLease.address == address,
+                    NonceLease.nonce == nonce
+                ).values(**values)
+            )
+
+    def release(self, address, nonce):
+        """Give back a nonce whose transaction was never sent, it is handed out next"""
+        self._set_lease(address, nonce, state="LEASED", expires_at=datetime.datetime.utcnow())
+
+    def mark_sent(self, address, nonce):
+        """Keep lease of a sent transaction until it is mined or considered dropped"""
+        self._set_lease(address, nonce, state="SENT", expires_at=datetime.datetime.utcnow() + self.drop_timeout)
+
+    def confirm(self, address, nonce):
+        """Transaction was mined, the nonce is used for good"""
+        with database.engine.begin() as connection:
+            connection.execute(
+                delete(NonceLease).where(
+                    NonceLease.address == address,
+                    NonceLease.nonce == nonce
+                )
+            )
+
+    def reset(self, address):
+        """
+        Resync shared sequence with the chain.
+        Nonces below the chain's pending count are used and their leases dropped.
+        Nonces between the pending count and the sequence that have no lease were lost,
+        they get expired leases so they are handed out again.
+        """
+        self._create_sequence(address)
+        now = datetime.datetime.utcnow()
+
+        with database.engine.begin() as connection:
+            next_nonce = self._lock_sequence(connection, address)
+            chain_nonce = get_pending_nonce(address)
+
+            connection.execute(
+                delete(NonceLease).where(
+                    NonceLease.address == address,
+                    NonceLease.nonce < chain_nonce
+                )
+            )
+
+            if chain_nonce >= next_nonce:
+                connection.execute(
+                    update(NonceSequence).where(
+                        NonceSequence.address == address
+                    ).values(next_nonce=chain_nonce)
+                )
+                return
+
+            leased = set(connection.execute(
+                select(NonceLease.nonce).where(
+                    NonceLease.address == address,
+                    NonceLease.nonce >= chain_nonce
+                )
+            ).scalars())
+
+            lost = [
+                {"address": address, "nonce": nonce, "state": "LEASED", "expires_at": now}
+                for nonce in range(chain_nonce, next_nonce) if nonce not in leased
+            ]
+            if lost:
+                connection.execute(NonceLease.__table__.insert(), lost)
+
+
+# Nonces of the owner hot wallet, see NONCE_BACKEND
+if NONCE_BACKEND == "database":
+    owner_nonces = DatabaseNonceManager(NONCE_LEASE_TIMEOUT, NONCE_DROP_TIMEOUT)
+else:
+    owner_nonces = NonceManager()
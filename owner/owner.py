@@ -3,6 +3,7 @@ import os
 from flask import Flask, jsonify, request
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt
 
+from catalog import bump_catalog_version, record_catalog_changes
 from configuration import Configuration
 from models import database, Product, Category, ProductCategory
 
@@ -79,6 +80,9 @@ def update():
 
     # Create products for database
     try:
+        changed_product_ids = []
+        changed_category_ids = []
+
         for product_data in products_to_add:
             new_product = Product(
                 name=product_data["name"],
@@ -86,6 +90,7 @@ def update():
             )
             database.session.add(new_product)
             database.session.flush() # get id without commiting
+            changed_product_ids.append(new_product.id)
 
             for category_name in product_data["categories"]:
                 # check if it exists
@@ -103,6 +108,12 @@ def update():
                     category_id=category.id
                 )
                 database.session.add(product_category)
+                changed_category_ids.append(category.id)
+
+        # Invalidate customer search caches together with the new products
+        # and log what changed for catalog sync clients
+        catalog_version = bump_catalog_version()
+        record_catalog_changes(catalog_version, changed_product_ids, changed_category_ids)
 
         # Commit all changes
         database.session.commit()
@@ -0,0 +1,120 @@
+import datetime
+from contextlib import contextmanager
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+
+from models import database, PooledContract, WorkerLock
+
+
+def add_pooled_contract(address):
+    """Put a freshly deployed OrderPaymentPooled contract into the pool"""
+    with database.engine.begin() as connection:
+        connection.execute(PooledContract.__table__.insert().values(
+            address=address,
+            state="AVAILABLE",
+            deployed_at=datetime.datetime.utcnow()
+        ))
+
+
+def claim_pooled_contract():
+    """
+    Take the oldest available contract out of the pool, returns its address or None when empty.
+    Runs on its own connection with SKIP LOCKED, so concurrent orders never claim the same contract
+    and a claimed contract is never handed out again, even if the order is rolled back.
+    """
+    with database.engine.begin() as connection:
+        address = connection.execute(
+            select(PooledContract.address).where(
+                PooledContract.state == "AVAILABLE"
+            ).order_by(
+                PooledContract.deployed_at.asc()
+            ).limit(1).with_for_update(skip_locked=True)
+        ).scalar()
+
+        if address is None:
+            return None
+
+        connection.execute(
+            update(PooledContract).where(
+                PooledContract.address == address
+            ).values(state="CLAIMED", claimed_at=datetime.datetime.utcnow())
+        )
+
+        return address
+
+
+def release_pooled_contract(address):
+    """Put a claimed contract whose initialization did not happen back into the pool"""
+    with database.engine.begin() as connection:
+        connection.execute(
+            update(PooledContract).where(
+                PooledContract.address == address
+            ).values(state="AVAILABLE", claimed_at=None)
+        )
+
+
+def mark_pooled_contract_failed(address):
+    """Keep a claimed contract in an unknown or initialized state out of the pool for good"""
+    with database.engine.begin() as connection:
+        connection.execute(
+            update(PooledContract).where(
+                PooledContract.address == address
+            ).values(state="FAILED")
+        )
+
+
+def count_available_contracts():
+    with database.engine.connect() as connection:
+        return connection.execute(
+            select(func.count()).select_from(PooledContract).where(PooledContract.state == "AVAILABLE")
+        ).scalar()
+
+
+def count_recent_claims(seconds):
+    """Number of contracts claimed within the last seconds, i.e. the recent order rate"""
+    since = datetime.datetime.utcnow() - datetime.timedelta(seconds=seconds)
+
+    with database.engine.connect() as connection:
+        return connection.execute(
+            select(func.count()).select_from(PooledContract).where(
+                PooledContract.state == "CLAIMED",
+                PooledContract.claimed_at >= since
+            )
+        ).scalar()
+
+
+def purge_claimed_contracts(seconds):
+    """Forget contracts claimed longer than seconds ago, they are only kept to measure the order rate"""
+    before = datetime.datetime.utcnow() - datetime.timedelta(seconds=seconds)
+
+    with database.engine.begin() as connection:
+        connection.execute(
+            delete(PooledContract).where(
+                PooledContract.state == "CLAIMED",
+                PooledContract.claimed_at < before
+            )
+        )
+
+
+@contextmanager
+def worker_lock(name):
+    """
+    Hold the worker_locks row of a background job while the block runs, yields False without waiting
+    when another process holds it, so only one process of all replicas runs the job at a time.
+    The row is created on first use when init.sql did not seed it.
+    """
+    with database.engine.begin() as connection:
+        row = select(WorkerLock.name).where(WorkerLock.name == name)
+
+        acquired = connection.execute(row.with_for_update(skip_locked=True)).scalar() is not None
+        if not acquired and connection.execute(row).scalar() is None:
+            try:
+                with connection.begin_nested():
+                    connection.execute(WorkerLock.__table__.insert().values(name=name))
+                acquired = True
+            except IntegrityError:
+                # another process created it first
+                acquired = False
+
+        yield acquired
@@ -0,0 +1,64 @@
+import threading
+
+from contracts import send_pooled_deployment
+from pool import add_pooled_contract, count_available_contracts, count_recent_claims, purge_claimed_contracts, worker_lock
+
+# worker_locks row held while provisioning
+PROVISIONER_LOCK = "escrow_provisioner"
+
+
+class EscrowProvisioner(threading.Thread):
+    """
+    Background worker keeping a pool of pre-deployed OrderPaymentPooled contracts.
+    The target size is the number of orders of the last rate_window seconds,
+    so the pool holds about one window of orders, bounded by min_size and max_size.
+    Every worker process runs a provisioner, but only the one holding the worker lock deploys.
+    """
+
+    def __init__(self, application, poll_interval, min_size, max_size, rate_window):
+        super().__init__(name="escrow-provisioner", daemon=True)
+        self.application = application
+        self.poll_interval = poll_interval
+        self.min_size = min_size
+        self.max_size = max_size
+        self.rate_window = rate_window
+        self._wakeup = threading.Event()
+
+    def notify(self):
+        """Wake the provisioner up, called after a pooled contract was claimed"""
+        self._wakeup.set()
+
+    def run(self):
+        while True:
+            try:
+                with self.application.app_context():
+                    self.provision()
+            except Exception as e:
+                print(f"Warning: escrow provisioner failed: {str(e)}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def target_size(self):
+        """Pool size for the recent order rate"""
+        recent_orders = count_recent_claims(self.rate_window)
+        return max(self.min_size, min(self.max_size, recent_orders))
+
+    def provision(self):
+        """
+        Deploy contracts until the pool reaches its target size, returns the number deployed.
+        Returns 0 right away while another process is provisioning.
+        """
+        with worker_lock(PROVISIONER_LOCK) as acquired:
+            if not acquired:
+                return 0
+
+            purge_claimed_contracts(self.rate_window)
+
+            missing = self.target_size() - count_available_contracts()
+
+            for _ in range(max(missing, 0)):
+                receipt = send_pooled_deployment()
+                add_pooled_contract(receipt['contractAddress'])
+
+            return max(missing, 0)
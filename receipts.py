@@ -0,0 +1,237 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from caching import LRUCache
+from configuration import RECEIPT_POLL_INTERVAL, RECEIPT_BATCH_SIZE, RECEIPT_TIMEOUT, RECEIPT_HISTORY_SIZE
+from utilities import get_receipt, get_receipts, to_hex_hash
+
+# Transaction states reported by ReceiptTracker.status
+PENDING = "PENDING"
+CONFIRMED = "CONFIRMED"
+FAILED = "FAILED"
+DROPPED = "DROPPED"
+UNKNOWN = "UNKNOWN"
+
+
+class TrackedTransaction:
+    """Sent transaction waiting for its receipt"""
+
+    def __init__(self, transaction_hash, callbacks):
+        self.transaction_hash = transaction_hash
+        self.callbacks = callbacks
+        self.future = Future()
+        self.sent_at = time.monotonic()
+
+
+class ReceiptTracker(threading.Thread):
+    """
+    Waits for receipts of sent transactions in the background, so senders get the transaction
+    hash right away instead of holding a worker until it is mined.
+    Pending hashes are polled together every `interval` seconds with batched
+    eth_getTransactionReceipt requests of up to `batch_size` hashes.
+    Transactions without a receipt after `timeout` seconds are considered dropped.
+    Callbacks run on the tracker thread, inside the application context when an application
+    was registered with init_app.
+    """
+
+    def __init__(self, interval, batch_size, timeout, history_size):
+        super().__init__(name="receipt-tracker", daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.application = None
+        self.polls = 0
+        self.confirmed = 0
+        self.failed = 0
+        self.dropped = 0
+        self._pending = {}
+        self._finished = LRUCache(history_size)
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def init_app(self, application):
+        """Run callbacks inside the application context, so they can use the database"""
+        self.application = application
+
+    def _tracked(self, transaction_hash, callback=None):
+        """
+        Get (TrackedTransaction, None) of a pending hash, added if it is not known yet,
+        or (None, (status, receipt)) if it already finished.
+        """
+        with self._lock:
+            tracked = self._pending.get(transaction_hash)
+            if tracked is None:
+                finished = self._finished.get(transaction_hash)
+                if finished is not None:
+                    return None, finished
+                tracked = self._pending[transaction_hash] = TrackedTransaction(transaction_hash, [])
+            if callback is not None:
+                tracked.callbacks.append(callback)
+
+        self._start()
+        self._wakeup.set()
+        return tracked, None
+
+    def track(self, transaction_hash, callback=None):
+        """
+        Start tracking a sent transaction, returns its hex hash.
+        callback(status, receipt) runs once it is CONFIRMED, FAILED (reverted) or DROPPED (receipt None).
+        """
+        transaction_hash = to_hex_hash(transaction_hash)
+
+        tracked, finished = self._tracked(transaction_hash, callback)
+        if tracked is None and callback is not None:
+            self._run_callback(transaction_hash, callback, *finished)
+
+        return transaction_hash
+
+    def wait(self, transaction_hash, timeout=None):
+        """
+        Block until a transaction is mined and get its receipt.
+        Like wait_for_transaction_receipt, reverted transactions return their receipt, dropped ones raise.
+        By default waits until the tracker gives the transaction up as dropped.
+        """
+        transaction_hash = to_hex_hash(transaction_hash)
+
+        if timeout is None:
+            timeout = self.timeout + self.interval
+
+        tracked, finished = self._tracked(transaction_hash)
+        if tracked is not None:
+            return tracked.future.result(timeout)
+
+        status, receipt = finished
+        if status == DROPPED:
+            raise Exception(f"Transaction {transaction_hash} not mined after {self.timeout} seconds")
+        return receipt
+
+    def status(self, transaction_hash):
+        """
+        Get PENDING, CONFIRMED, FAILED or DROPPED for a transaction of this process.
+        Transactions tracked elsewhere are looked up on the chain, UNKNOWN when they have no receipt.
+        """
+        transaction_hash = to_hex_hash(transaction_hash)
+
+        with self._lock:
+            if transaction_hash in self._pending:
+                return PENDING
+
+        finished = self._finished.get(transaction_hash)
+        if finished is not None:
+            return finished[0]
+
+        receipt = get_receipts([transaction_hash])[0]
+        if receipt is None:
+            return UNKNOWN
+        return CONFIRMED if receipt["status"] == 1 else FAILED
+
+    def run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Warning: receipt tracker poll failed: {str(e)}")
+
+    def poll(self):
+        """
+        Check all pending transactions once, returns the number that finished.
+        A failed batch request is retried hash by hash, hashes that still cannot be checked
+        count as not mined, so they are dropped after the timeout even while the node fails.
+        """
+        with self._lock:
+            pending = list(self._pending.values())
+
+        finished = 0
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            receipts = self._fetch([tracked.transaction_hash for tracked in batch])
+
+            with self._lock:
+                self.polls += 1
+
+            now = time.monotonic()
+            for tracked, receipt in zip(batch, receipts):
+                if receipt is not None:
+                    self._finish(tracked, CONFIRMED if receipt["status"] == 1 else FAILED, receipt)
+                    finished += 1
+                elif now - tracked.sent_at > self.timeout:
+                    self._finish(tracked, DROPPED, None)
+                    finished += 1
+
+        return finished
+
+    def _fetch(self, transaction_hashes):
+        """Receipts of a batch, falling back to single requests when the batch request fails"""
+        try:
+            return get_receipts(transaction_hashes)
+        except Exception as e:
+            print(f"Warning: batched receipt request failed, checking one by one: {str(e)}")
+
+        receipts = []
+        for transaction_hash in transaction_hashes:
+            try:
+                receipts.append(get_receipt(transaction_hash))
+            except Exception as e:
+                print(f"Warning: receipt request of {transaction_hash} failed: {str(e)}")
+                receipts.append(None)
+
+        return receipts
+
+    def _run_callback(self, transaction_hash, callback, status, receipt):
+        try:
+            if self.application is not None:
+                with self.application.app_context():
+                    callback(status, receipt)
+            else:
+                callback(status, receipt)
+        except Exception as e:
+            print(f"Warning: receipt callback of {transaction_hash} failed: {str(e)}")
+
+    def _finish(self, tracked, status, receipt):
+        with self._lock:
+            self._pending.pop(tracked.transaction_hash, None)
+            self._finished.put(tracked.transaction_hash, (status, receipt))
+
+            if status == CONFIRMED:
+                self.confirmed += 1
+            elif status == FAILED:
+                self.failed += 1
+            else:
+                self.dropped += 1
+
+        for callback in tracked.callbacks:
+            self._run_callback(tracked.transaction_hash, callback, status, receipt)
+
+        if status == DROPPED:
+            tracked.future.set_exception(Exception(f"Transaction {tracked.transaction_hash} not mined after {self.timeout} seconds"))
+        else:
+            tracked.future.set_result(receipt)
+
+    def stats(self):
+        """Get pending transactions and completion counters"""
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "polls": self.polls,
+                "confirmed": self.confirmed,
+                "failed": self.failed,
+                "dropped": self.dropped
+            }
+
+    def _start(self):
+        """Start polling on first use"""
+        if self.is_alive():
+            return
+
+        with self._start_lock:
+            if not self.is_alive():
+                self.start()
+
+
+# Receipts of every transaction sent by this process
+receipt_tracker = ReceiptTracker(RECEIPT_POLL_INTERVAL, RECEIPT_BATCH_SIZE, RECEIPT_TIMEOUT, RECEIPT_HISTORY_SIZE)
@@ -0,0 +1,92 @@
+import unittest
+
+from addresses import checksum_encode, to_checksum_address, is_valid_address
+
+# Test vectors of EIP-55
+CHECKSUM_ADDRESSES = [
+    # all caps
+    "0x52908400098527886E0F7030069857D2E4169EE7",
+    "0x8617E340B3D01FA5F11F306F4090FD50E238070D",
+    # all lower
+    "0xde709f2102306220921060314715629080e2fb77",
+    "0x27b1fdb04752bbc536007a920d24acb045561c26",
+    # normal
+    "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed",
+    "0xfB6916095ca1df60bB79Ce92cE3Ea74c37c5d359",
+    "0xdbF03B407c01E7cD3CBea99509d93f8DDDC8C6FB",
+    "0xD1220A0cf47c7B9Be7A2E6BA89F429762e7b9aDb",
+]
+
+MIXED_CASE_ADDRESSES = CHECKSUM_ADDRESSES[4:]
+
+
+class ChecksumEncodeTests(unittest.TestCase):
+
+    def test_eip55_vectors(self):
+        for address in MIXED_CASE_ADDRESSES:
+            self.assertEqual(checksum_encode(address[2:]), address)
+
+    def test_input_case_does_not_matter(self):
+        for address in MIXED_CASE_ADDRESSES:
+            self.assertEqual(checksum_encode(address[2:].upper()), address)
+
+
+class ToChecksumAddressTests(unittest.TestCase):
+
+    def test_checksummed_addresses_are_kept(self):
+        for address in MIXED_CASE_ADDRESSES:
+            self.assertEqual(to_checksum_address(address), address)
+
+    def test_single_case_addresses_are_checksummed(self):
+        for address in MIXED_CASE_ADDRESSES:
+            self.assertEqual(to_checksum_address(address.lower()), address)
+            self.assertEqual(to_checksum_address("0x" + address[2:].upper()), address)
+
+    def test_prefix_is_optional(self):
+        for address in MIXED_CASE_ADDRESSES:
+            self.assertEqual(to_checksum_address(address[2:]), address)
+
+    def test_wrong_checksum_is_rejected(self):
+        address = MIXED_CASE_ADDRESSES[0]
+        # swap the case of one letter, the remaining letters keep the address mixed case
+        wrong = address[:3] + address[3].swapcase() + address[4:]
+        self.assertIsNone(to_checksum_address(wrong))
+
+    def test_malformed_addresses_are_rejected(self):
+        address = MIXED_CASE_ADDRESSES[0]
+        for malformed in [
+            address + "\n",
+            "\n" + address,
+            " " + address,
+            address[:-1],
+            address + "0",
+            "0X" + address[2:],
+            "0x" + "g" * 40,
+            "",
+        ]:
+            self.assertIsNone(to_checksum_address(malformed), repr(malformed))
+
+    def test_non_strings_are_rejected(self):
+        for value in [None, 5, b"0x5aaeb6053f3e94c9b9a09f33669435e7ef1beaed"]:
+            self.assertIsNone(to_checksum_address(value))
+
+    def test_repeated_lookups_are_cached(self):
+        address = MIXED_CASE_ADDRESSES[1].lower()
+        self.assertEqual(to_checksum_address(address), to_checksum_address(address))
+        self.assertIsNone(to_checksum_address(address + "\n"))
+        self.assertIsNone(to_checksum_address(address + "\n"))
+
+
+class IsValidAddressTests(unittest.TestCase):
+
+    def test_vectors_are_valid(self):
+        for address in CHECKSUM_ADDRESSES:
+            self.assertTrue(is_valid_address(address))
+
+    def test_invalid_addresses(self):
+        self.assertFalse(is_valid_address(MIXED_CASE_ADDRESSES[0] + "\n"))
+        self.assertFalse(is_valid_address("not an address"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from autocomplete import PrefixIndex, build_autocomplete_index
+from catalog import CatalogSnapshot
+
+
+class PrefixIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PrefixIndex(["Red Apple", "apricot", "Banana", "APPLE PIE", "Apple"])
+
+    def test_prefix_is_case_insensitive(self):
+        self.assertEqual(self.index.complete("ap", 10), ["Apple", "APPLE PIE", "apricot"])
+        self.assertEqual(self.index.complete("APP", 10), ["Apple", "APPLE PIE"])
+
+    def test_limit(self):
+        self.assertEqual(self.index.complete("a", 2), ["Apple", "APPLE PIE"])
+        self.assertEqual(self.index.complete("a", 0), [])
+
+    def test_no_match(self):
+        self.assertEqual(self.index.complete("z", 10), [])
+        self.assertEqual(self.index.complete("apples", 10), [])
+
+    def test_empty_prefix_lists_everything_in_order(self):
+        self.assertEqual(self.index.complete("", 10), ["Apple", "APPLE PIE", "apricot", "Banana", "Red Apple"])
+
+    def test_empty_index(self):
+        self.assertEqual(PrefixIndex([]).complete("a", 10), [])
+
+
+class BuildAutocompleteIndexTests(unittest.TestCase):
+
+    def test_products_and_categories(self):
+        snapshot = CatalogSnapshot(1, [(1, "Red Apple", 10), (2, "Rice", 2)], {"Fruit": [1], "Grain": [2]})
+        index = build_autocomplete_index(snapshot)
+
+        self.assertEqual(index["products"].complete("r", 10), ["Red Apple", "Rice"])
+        self.assertEqual(index["categories"].complete("g", 10), ["Grain"])
+
+
+if __name__ == "__main__":
+    unittest.main()
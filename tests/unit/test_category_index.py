@@ -0,0 +1,62 @@
+import unittest
+
+from category_index import CategoryIndex
+
+CATEGORIES = {
+    "Fruit": [1, 2, 4],
+    "Red": [1, 3],
+    "Dessert": [3],
+    "Dried Fruit": [5],
+    "Empty": []
+}
+
+
+class CategoryIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = CategoryIndex(CATEGORIES)
+
+    def test_matching_names_like_contains(self):
+        self.assertEqual(self.index.matching_names("fruit"), ["Dried Fruit", "Fruit"])
+        self.assertEqual(self.index.matching_names("E"), ["Dessert", "Dried Fruit", "Empty", "Red"])
+        self.assertEqual(self.index.matching_names("zzz"), [])
+
+    def test_pattern_selects_union_of_its_categories(self):
+        product_ids, names = self.index.select(["fruit"])
+
+        self.assertEqual(list(product_ids), [1, 2, 4, 5])
+        self.assertEqual(names, {"Fruit", "Dried Fruit"})
+
+    def test_patterns_are_unioned_by_default(self):
+        product_ids, names = self.index.select(["red", "dessert"])
+
+        self.assertEqual(list(product_ids), [1, 3])
+        self.assertEqual(names, {"Red", "Dessert"})
+
+    def test_patterns_are_intersected_with_match_all(self):
+        product_ids, names = self.index.select(["fruit", "red"], match_all=True)
+
+        self.assertEqual(list(product_ids), [1])
+        self.assertEqual(names, {"Fruit", "Dried Fruit", "Red"})
+
+    def test_unknown_pattern(self):
+        self.assertEqual(list(self.index.select(["zzz"])[0]), [])
+        self.assertEqual(list(self.index.select(["fruit", "zzz"], match_all=True)[0]), [])
+        self.assertEqual(list(self.index.select(["fruit", "zzz"])[0]), [1, 2, 4, 5])
+
+    def test_no_patterns(self):
+        product_ids, names = self.index.select([])
+
+        self.assertEqual(list(product_ids), [])
+        self.assertEqual(names, set())
+
+    def test_indexed_bitmaps_are_not_modified(self):
+        self.index.select(["fruit", "red"], match_all=True)
+        self.index.select(["red", "dessert"])
+
+        self.assertEqual(list(self.index.bitmaps["Fruit"]), [1, 2, 4])
+        self.assertEqual(list(self.index.bitmaps["Red"]), [1, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from decimal import Decimal
+
+import numpy as np
+from pyroaring import BitMap
+
+from columnar import ColumnarCatalog, build_columnar_catalog
+from catalog import CatalogSnapshot
+
+PRODUCTS = [
+    (2, "Red Apple", Decimal("10.00")),
+    (5, "Green Apple", Decimal("5.50")),
+    (7, "Banana Split", Decimal("3.00")),
+    (9, "apricot", Decimal("7.25")),
+    (11, "100% Juice", Decimal("2.99")),
+]
+
+
+class ColumnarCatalogTests(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = ColumnarCatalog(PRODUCTS)
+
+    def ids(self, mask):
+        return self.catalog.ids[mask].tolist()
+
+    def test_rows_read_like_the_product_list(self):
+        self.assertEqual(len(self.catalog), 5)
+        self.assertEqual(self.catalog[1], (5, "Green Apple", Decimal("5.50")))
+        self.assertEqual(list(self.catalog), PRODUCTS)
+        self.assertEqual(self.catalog.name(3), "apricot")
+
+    def test_name_mask_is_case_insensitive_contains(self):
+        self.assertEqual(self.ids(self.catalog.name_mask("APPLE")), [2, 5])
+        self.assertEqual(self.ids(self.catalog.name_mask("p")), [2, 5, 7, 9])
+        self.assertEqual(self.ids(self.catalog.name_mask("zzz")), [])
+        self.assertEqual(self.ids(self.catalog.name_mask("")), [2, 5, 7, 9, 11])
+
+    def test_name_mask_has_no_wildcards(self):
+        self.assertEqual(self.ids(self.catalog.name_mask("%")), [11])
+        self.assertEqual(self.ids(self.catalog.name_mask("_")), [])
+
+    def test_name_mask_does_not_match_across_names(self):
+        self.assertEqual(self.ids(self.catalog.name_mask("apple\ngreen")), [])
+        self.assertEqual(self.ids(self.catalog.name_mask("appleg")), [])
+
+    def test_name_mask_matches_python_contains(self):
+        names = [name for _, name, _ in PRODUCTS]
+        for pattern in ["a", "an", "e ", "t", "ice", "1"]:
+            expected = np.array([pattern in name.lower() for name in names])
+            self.assertTrue((self.catalog.name_mask(pattern) == expected).all(), pattern)
+
+    def test_price_mask_bounds_are_inclusive(self):
+        self.assertEqual(self.ids(self.catalog.price_mask(Decimal("3"), Decimal("7.25"))), [5, 7, 9])
+        self.assertEqual(self.ids(self.catalog.price_mask(None, Decimal("2.99"))), [11])
+        self.assertEqual(self.ids(self.catalog.price_mask(Decimal("10.001"), None)), [])
+        self.assertEqual(self.ids(self.catalog.price_mask(None, None)), [2, 5, 7, 9, 11])
+
+    def test_id_mask_ignores_unknown_ids(self):
+        self.assertEqual(self.ids(self.catalog.id_mask(BitMap([1, 5, 11, 12, 100]))), [5, 11])
+        self.assertEqual(self.ids(self.catalog.id_mask(BitMap())), [])
+
+    def test_ordered_rows(self):
+        mask = np.ones(len(self.catalog), dtype=bool)
+
+        self.assertEqual(self.catalog.ids[self.catalog.ordered_rows(mask, "id")].tolist(), [2, 5, 7, 9, 11])
+        self.assertEqual(self.catalog.ids[self.catalog.ordered_rows(mask, "price")].tolist(), [11, 7, 5, 9, 2])
+        self.assertEqual(self.catalog.ids[self.catalog.ordered_rows(mask, "name")].tolist(), [11, 9, 7, 5, 2])
+
+    def test_id_bitmap(self):
+        self.assertEqual(list(self.catalog.id_bitmap(np.array([0, 4]))), [2, 11])
+
+    def test_empty_catalog(self):
+        catalog = ColumnarCatalog([])
+
+        self.assertEqual(len(catalog), 0)
+        self.assertEqual(catalog.name_mask("a").tolist(), [])
+
+
+class BuildColumnarCatalogTests(unittest.TestCase):
+
+    def test_tuple_snapshot_is_converted(self):
+        catalog = build_columnar_catalog(CatalogSnapshot(1, PRODUCTS, {}))
+        self.assertEqual(list(catalog), PRODUCTS)
+
+    def test_columnar_snapshot_is_reused(self):
+        catalog = ColumnarCatalog(PRODUCTS)
+        self.assertIs(build_columnar_catalog(CatalogSnapshot(1, catalog, {})), catalog)
+
+
+if __name__ == "__main__":
+    unittest.main()
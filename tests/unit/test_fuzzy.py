@@ -0,0 +1,154 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import fuzzy
+from catalog import CatalogSnapshot
+from fuzzy import tokenize, edit_distance, deletes, term_max_distance, FuzzyIndex, FuzzyIndexBuilder
+
+
+class EditDistanceTests(unittest.TestCase):
+
+    def test_distances(self):
+        self.assertEqual(edit_distance("apple", "apple", 2), 0)
+        self.assertEqual(edit_distance("aple", "apple", 2), 1)
+        self.assertEqual(edit_distance("appel", "apple", 2), 1)  # adjacent transposition
+        self.assertEqual(edit_distance("banana", "bananna", 2), 1)
+        self.assertEqual(edit_distance("kitten", "sitting", 3), 3)
+        self.assertEqual(edit_distance("", "ab", 2), 2)
+
+    def test_stops_above_max_distance(self):
+        self.assertEqual(edit_distance("apple", "orange", 2), 3)
+        self.assertEqual(edit_distance("a", "abcdef", 2), 3)
+
+
+class TokenizeAndDeletesTests(unittest.TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Red Apple-Pie, 2kg"), ["red", "apple", "pie", "2kg"])
+
+    def test_deletes(self):
+        self.assertEqual(deletes("abc", 1), {"abc", "bc", "ac", "ab"})
+        self.assertEqual(deletes("ab", 2), {"ab", "a", "b", ""})
+        self.assertEqual(deletes("abc", 0), {"abc"})
+
+    def test_term_max_distance(self):
+        self.assertEqual([term_max_distance("a" * length, 2) for length in range(1, 8)], [0, 0, 1, 1, 1, 2, 2])
+        self.assertEqual(term_max_distance("apple", 0), 0)
+
+
+class FuzzyIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = FuzzyIndex(["Red Apple", "Green Apple", "Banana Split", "Apricot", "Pineapple"], max_distance=2)
+
+    def test_lookup(self):
+        self.assertEqual(self.index.lookup("aple", 2), {"apple": 1})
+        self.assertEqual(self.index.lookup("aple", 0), {})
+        self.assertEqual(self.index.lookup("pinaple", 2), {"pineapple": 2})
+
+    def test_search_ranks_by_distance_then_position(self):
+        self.assertEqual(self.index.search("aple", 2), [(0, 1), (1, 1)])
+        self.assertEqual(self.index.search("red aple", 2), [(0, 1)])
+        self.assertEqual(self.index.search("grean appel", 2), [(1, 2)])
+
+    def test_short_terms_allow_fewer_edits(self):
+        self.assertEqual(self.index.search("rd", 2), [])
+        self.assertEqual(self.index.search("axxle", 2), [])
+        self.assertEqual(self.index.search("pinaple", 2), [(4, 2)])
+
+    def test_every_term_has_to_match(self):
+        self.assertEqual(self.index.search("apple zzzz", 2), [])
+
+    def test_max_distance_is_capped_by_index(self):
+        self.assertEqual(self.index.search("xpricxt", 5), [(3, 2)])
+        self.assertEqual(self.index.search("xprxcxt", 5), [])
+
+    def test_empty_query(self):
+        self.assertEqual(self.index.search("", 2), [])
+        self.assertEqual(self.index.search("!!", 2), [])
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll condition until it holds or timeout seconds passed, returns its last value"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class FuzzyIndexBuilderTests(unittest.TestCase):
+
+    def snapshot(self, version, names):
+        return CatalogSnapshot(version, [(position + 1, name, 1) for position, name in enumerate(names)], {})
+
+    def built(self, builder, snapshot):
+        """Wait until builder has built the index of snapshot"""
+        return wait_for(lambda: (builder.get(snapshot) or (None,))[0] is snapshot)
+
+    def test_first_index_is_built_in_background(self):
+        builder = FuzzyIndexBuilder()
+        snapshot = self.snapshot(1, ["Apple"])
+
+        self.assertIsNone(builder.get(snapshot))
+        self.assertTrue(self.built(builder, snapshot))
+
+        built_snapshot, index = builder.get(snapshot)
+
+        self.assertIs(built_snapshot, snapshot)
+        self.assertEqual(index.search("aple", 2), [(0, 1)])
+
+    def test_previous_index_is_served_while_rebuilding(self):
+        builder = FuzzyIndexBuilder()
+        first = self.snapshot(1, ["Apple"])
+        self.assertTrue(self.built(builder, first))
+
+        started, release = threading.Event(), threading.Event()
+        build = fuzzy.build_fuzzy_index
+
+        def slow_build(snapshot):
+            started.set()
+            release.wait(5)
+            return build(snapshot)
+
+        second = self.snapshot(2, ["Apple", "Maple"])
+        with mock.patch("fuzzy.build_fuzzy_index", slow_build):
+            self.assertIs(builder.get(second)[0], first)
+            self.assertTrue(started.wait(5))
+            self.assertIs(builder.get(second)[0], first)
+            release.set()
+
+            self.assertTrue(wait_for(lambda: builder.get(second)[0] is second))
+
+        snapshot, index = builder.get(second)
+        self.assertIs(snapshot, second)
+        self.assertEqual(index.search("aple", 2), [(0, 1), (1, 1)])
+
+    def test_failed_rebuild_is_retried(self):
+        builder = FuzzyIndexBuilder()
+        first = self.snapshot(1, ["Apple"])
+        self.assertTrue(self.built(builder, first))
+
+        second = self.snapshot(2, ["Maple"])
+        with mock.patch("fuzzy.build_fuzzy_index", side_effect=Exception("boom")), mock.patch("builtins.print"):
+            builder.get(second)
+            self.assertTrue(wait_for(lambda: not builder._running))
+
+        # the failed version is requested again by the next search
+        self.assertIs(builder.get(second)[0], first)
+        self.assertTrue(wait_for(lambda: builder.get(second)[0] is second))
+
+    def test_failed_first_build_is_retried(self):
+        builder = FuzzyIndexBuilder()
+        snapshot = self.snapshot(1, ["Apple"])
+
+        with mock.patch("fuzzy.build_fuzzy_index", side_effect=Exception("boom")), mock.patch("builtins.print"):
+            self.assertIsNone(builder.get(snapshot))
+            self.assertTrue(wait_for(lambda: not builder._running))
+
+        self.assertTrue(self.built(builder, snapshot))
+
+
+if __name__ == "__main__":
+    unittest.main()
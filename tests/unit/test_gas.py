@@ -0,0 +1,142 @@
+import unittest
+from unittest import mock
+
+from gas import GasOracle, GasEstimator, FeeHistoryUnsupported, is_unsupported_method
+
+
+class GasOracleBumpTests(unittest.TestCase):
+
+    def setUp(self):
+        self.oracle = GasOracle("auto", interval=5, max_age=30, bump_percent=12)
+
+    def test_fee_fields_are_raised(self):
+        transaction = {"maxFeePerGas": 100, "maxPriorityFeePerGas": 10, "gas": 21000, "nonce": 3}
+
+        self.assertIs(self.oracle.bump(transaction), transaction)
+        self.assertEqual(transaction, {"maxFeePerGas": 112, "maxPriorityFeePerGas": 12, "gas": 21000, "nonce": 3})
+
+    def test_bumps_compound_and_round_up(self):
+        self.assertEqual(self.oracle.bump({"gasPrice": 100}, 2), {"gasPrice": 126})  # 125.44
+        self.assertEqual(self.oracle.bump({"gasPrice": 1}), {"gasPrice": 2})
+
+    def test_zero_times_keeps_fees(self):
+        self.assertEqual(self.oracle.bump({"gasPrice": 100}, 0), {"gasPrice": 100})
+
+
+class FakeEth:
+    gas_price = 7
+    max_priority_fee = 3
+
+    def __init__(self, history=None, error=None):
+        self.history = history
+        self.error = error
+
+    def fee_history(self, blocks, newest, percentiles):
+        if self.error is not None:
+            raise self.error
+        return self.history
+
+
+class FakeWeb3:
+
+    def __init__(self, eth):
+        self.eth = eth
+
+
+class GasOracleRefreshTests(unittest.TestCase):
+
+    def refresh(self, mode, eth):
+        oracle = GasOracle(mode, interval=5, max_age=30, bump_percent=12)
+        with mock.patch("gas.get_web3", return_value=FakeWeb3(eth)):
+            return oracle, oracle.refresh()
+
+    def test_eip1559_fees(self):
+        oracle, fees = self.refresh("auto", FakeEth({"baseFeePerGas": [10, 11, 12], "reward": [[1], [5], [2]]}))
+
+        self.assertEqual(fees, {"maxFeePerGas": 26, "maxPriorityFeePerGas": 2})
+        self.assertEqual(oracle.mode, "auto")
+
+    def test_auto_falls_back_when_method_is_missing(self):
+        error = ValueError({"code": -32000, "message": "RPC Endpoint has not been implemented: eth_feeHistory"})
+        oracle, fees = self.refresh("auto", FakeEth(error=error))
+
+        self.assertEqual(fees, {"gasPrice": 7})
+        self.assertEqual(oracle.mode, "legacy")
+
+    def test_auto_falls_back_without_base_fees(self):
+        oracle, fees = self.refresh("auto", FakeEth({"baseFeePerGas": [], "reward": []}))
+
+        self.assertEqual(fees, {"gasPrice": 7})
+        self.assertEqual(oracle.mode, "legacy")
+
+    def test_auto_keeps_mode_on_other_errors(self):
+        oracle = GasOracle("auto", interval=5, max_age=30, bump_percent=12)
+        with mock.patch("gas.get_web3", return_value=FakeWeb3(FakeEth(error=TimeoutError("read timed out")))):
+            with self.assertRaises(TimeoutError):
+                oracle.refresh()
+
+        self.assertEqual(oracle.mode, "auto")
+
+    def test_eip1559_mode_does_not_fall_back(self):
+        with self.assertRaises(FeeHistoryUnsupported):
+            self.refresh("eip1559", FakeEth({"reward": []}))
+
+
+class IsUnsupportedMethodTests(unittest.TestCase):
+
+    def test_unsupported(self):
+        self.assertTrue(is_unsupported_method(ValueError({"code": -32601, "message": "whatever"})))
+        self.assertTrue(is_unsupported_method(ValueError({"code": -32000, "message": "Method not found"})))
+        self.assertTrue(is_unsupported_method(NotImplementedError()))
+        self.assertTrue(is_unsupported_method(Exception("the method eth_feeHistory does not exist/is not available")))
+
+    def test_other_errors(self):
+        self.assertFalse(is_unsupported_method(ValueError({"code": -32000, "message": "header not found"})))
+        self.assertFalse(is_unsupported_method(TimeoutError("read timed out")))
+        self.assertFalse(is_unsupported_method(Exception()))
+
+
+class GasEstimatorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.estimator = GasEstimator(margin_percent=20, ttl=3600)
+
+    def test_margin_is_added_and_cached(self):
+        estimate = mock.Mock(return_value=100000)
+
+        self.assertEqual(self.estimator.gas_limit("key", estimate, 500000), 120000)
+        self.assertEqual(self.estimator.gas_limit("key", estimate, 500000), 120000)
+        self.assertEqual(estimate.call_count, 1)
+        self.assertEqual(self.estimator.stats(), {"size": 1, "estimates": 1, "failures": 0})
+
+    def test_failed_estimate_returns_default_and_caches_nothing(self):
+        estimate = mock.Mock(side_effect=Exception("execution reverted"))
+
+        self.assertEqual(self.estimator.gas_limit("key", estimate, 500000), 500000)
+        self.assertEqual(self.estimator.stats(), {"size": 0, "estimates": 0, "failures": 1})
+
+    def test_expired_estimate_only_raises_the_limit(self):
+        with mock.patch("gas.time.monotonic", return_value=0.0):
+            self.estimator.gas_limit("key", lambda: 100000, 500000)
+
+        with mock.patch("gas.time.monotonic", return_value=4000.0):
+            self.assertEqual(self.estimator.gas_limit("key", lambda: 50000, 500000), 120000)
+
+        with mock.patch("gas.time.monotonic", return_value=8000.0):
+            self.assertEqual(self.estimator.gas_limit("key", lambda: 200000, 500000), 240000)
+
+    def test_failed_re_estimate_keeps_last_limit(self):
+        with mock.patch("gas.time.monotonic", return_value=0.0):
+            self.estimator.gas_limit("key", lambda: 100000, 500000)
+
+        with mock.patch("gas.time.monotonic", return_value=4000.0):
+            self.assertEqual(self.estimator.gas_limit("key", mock.Mock(side_effect=Exception()), 500000), 120000)
+
+    def test_keys_are_independent(self):
+        self.estimator.gas_limit(("hash", "pay", None), lambda: 100000, 500000)
+
+        self.assertEqual(self.estimator.gas_limit(("hash", "pay", 2), lambda: 200000, 500000), 240000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import datetime
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from models import database, NonceSequence, NonceLease
+from nonces import NonceManager, DatabaseNonceManager
+
+ADDRESS = "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"
+
+
+class NonceManagerReleaseTests(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("nonces.get_pending_nonce", return_value=5)
+        self.get_pending_nonce = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.manager = NonceManager()
+
+    def test_latest_nonce_is_handed_out_again(self):
+        nonce = self.manager.allocate(ADDRESS)
+        self.manager.release(ADDRESS, nonce)
+
+        self.assertEqual(self.manager.allocate(ADDRESS), nonce)
+        self.assertEqual(self.get_pending_nonce.call_count, 1)
+
+    def test_gap_resyncs_from_chain(self):
+        first = self.manager.allocate(ADDRESS)
+        self.manager.allocate(ADDRESS)
+        self.manager.release(ADDRESS, first)
+
+        # a later nonce is in flight, the chain decides what comes next
+        self.get_pending_nonce.return_value = 6
+        self.assertEqual(self.manager.allocate(ADDRESS), 6)
+        self.assertEqual(self.get_pending_nonce.call_count, 2)
+
+    def test_release_of_unknown_address_is_ignored(self):
+        self.manager.release(ADDRESS, 3)
+        self.assertEqual(self.manager.allocate(ADDRESS), 5)
+
+
+class DatabaseNonceManagerResetTests(unittest.TestCase):
+
+    def setUp(self):
+        application = Flask(__name__)
+        application.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        database.init_app(application)
+
+        context = application.app_context()
+        context.push()
+        self.addCleanup(context.pop)
+
+        database.create_all()
+        self.addCleanup(database.drop_all)
+
+        self.manager = DatabaseNonceManager(lease_timeout=30, drop_timeout=300)
+
+    def seed(self, next_nonce, leases):
+        now = datetime.datetime.utcnow()
+        database.session.add(NonceSequence(address=ADDRESS, next_nonce=next_nonce))
+        for nonce, state in leases.items():
+            database.session.add(NonceLease(
+                address=ADDRESS,
+                nonce=nonce,
+                state=state,
+                expires_at=now + datetime.timedelta(seconds=300)
+            ))
+        database.session.commit()
+
+    def leases(self):
+        database.session.expire_all()
+        return {
+            lease.nonce: lease.state
+            for lease in NonceLease.query.filter(NonceLease.address == ADDRESS).order_by(NonceLease.nonce)
+        }
+
+    def next_nonce(self):
+        database.session.expire_all()
+        return database.session.get(NonceSequence, ADDRESS).next_nonce
+
+    def test_lost_nonces_get_expired_leases(self):
+        # 3 and 4 are mined, 7 is in flight, 5, 6, 8 and 9 were lost
+        self.seed(10, {3: "SENT", 4: "SENT", 7: "SENT"})
+
+        with mock.patch("nonces.get_pending_nonce", return_value=5):
+            self.manager.reset(ADDRESS)
+
+        self.assertEqual(self.leases(), {5: "LEASED", 6: "LEASED", 7: "SENT", 8: "LEASED", 9: "LEASED"})
+        self.assertEqual(self.next_nonce(), 10)
+
+        # lost nonces are handed out again, lowest first
+        with mock.patch("nonces.get_pending_nonce", return_value=5):
+            self.assertEqual([self.manager.allocate(ADDRESS) for _ in range(5)], [5, 6, 8, 9, 10])
+
+    def test_sequence_behind_chain_jumps_ahead(self):
+        self.seed(4, {3: "SENT"})
+
+        with mock.patch("nonces.get_pending_nonce", return_value=8):
+            self.manager.reset(ADDRESS)
+
+        self.assertEqual(self.leases(), {})
+        self.assertEqual(self.next_nonce(), 8)
+
+    def test_missing_sequence_is_created_from_chain(self):
+        with mock.patch("nonces.get_pending_nonce", return_value=12):
+            self.assertEqual(self.manager.allocate(ADDRESS), 12)
+
+        self.assertEqual(self.next_nonce(), 13)
+        self.assertEqual(self.leases(), {12: "LEASED"})
+
+    def test_in_sync_sequence_is_unchanged(self):
+        self.seed(6, {5: "SENT"})
+
+        with mock.patch("nonces.get_pending_nonce", return_value=5):
+            self.manager.reset(ADDRESS)
+
+        self.assertEqual(self.leases(), {5: "SENT"})
+        self.assertEqual(self.next_nonce(), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,26 @@
-import json
+import os
 import re
+import threading
 
 import bcrypt
-from eth_account import Account
+import requests
+from requests.adapters import HTTPAdapter
 from web3 import Web3, HTTPProvider
+from web3.datastructures import AttributeDict
+from web3.exceptions import TransactionNotFound
 
-from configuration import BLOCKCHAIN_URL
+try:
+    # web3 6 has no public batch API and no public formatter for raw receipts. This private helper
+    # is what web3.eth.get_transaction_receipt applies, web3 is pinned in requirements.txt for it.
+    from web3._utils.method_formatters import receipt_formatter
+except ImportError:
+    receipt_formatter = None
+
+from configuration import BLOCKCHAIN_URL, BLOCKCHAIN_POOL_SIZE, BLOCKCHAIN_CONNECT_TIMEOUT, BLOCKCHAIN_TIMEOUT
+
+# (pid, Web3) of this process, see get_web3
+_web3 = (None, None)
+_web3_lock = threading.Lock()
 
 
 def hash_password(password):
@@ -21,86 +36,116 @@ def is_valid_email(email):
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email)
 
+class PooledHTTPProvider(HTTPProvider):
+    """
+    HTTPProvider sending the requests of all threads through one keep-alive session.
+    The stock provider keeps a separate session per thread.
+    """
+
+    def __init__(self, endpoint_uri, session, request_kwargs=None):
+        super().__init__(endpoint_uri, request_kwargs)
+        self.session = session
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        response = self.session.post(self.endpoint_uri, data=request_data, **self.get_request_kwargs())
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+    def make_batch_request(self, method, params_list):
+        """Send one JSON-RPC batch calling method once per params, responses are in params order"""
+        if not params_list:
+            return []
+
+        requests_list = [
+            {"jsonrpc": "2.0", "method": method, "params": params, "id": next(self.request_counter)}
+            for params in params_list
+        ]
+        response = self.session.post(self.endpoint_uri, json=requests_list, **self.get_request_kwargs())
+        response.raise_for_status()
+
+        responses = self.decode_rpc_response(response.content)
+        if not isinstance(responses, list):
+            raise Exception(f"Batch {method} failed: {responses.get('error', responses)}")
+
+        # batch responses may come back in any order
+        by_id = {item.get("id"): item for item in responses}
+        return [by_id.get(item["id"], {"error": "missing response"}) for item in requests_list]
+
+def create_web3():
+    """Create web3 instance on a pooled keep-alive HTTP session"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=BLOCKCHAIN_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    provider = PooledHTTPProvider(
+        BLOCKCHAIN_URL,
+        session,
+        request_kwargs={"timeout": (BLOCKCHAIN_CONNECT_TIMEOUT, BLOCKCHAIN_TIMEOUT)}
+    )
+    return Web3(provider)
+
 def get_web3():
-    """Get web3 instance"""
-    return Web3(HTTPProvider(BLOCKCHAIN_URL))
+    """
+    Get the web3 instance shared by all threads of this process.
+    A forked worker gets its own instance, connections are never shared between processes.
+    """
+    global _web3
+
+    pid, web3 = _web3
+    if pid == os.getpid():
+        return web3
 
-def send_transaction(transaction, private_key):
-    """Sign and send transaction via blockchain"""
+    with _web3_lock:
+        if _web3[0] != os.getpid():
+            _web3 = (os.getpid(), create_web3())
+        return _web3[1]
+
+def submit_transaction(transaction, private_key):
+    """Sign and send transaction via blockchain, returns transaction hash without waiting"""
     web3 = get_web3()
     signed_transaction = web3.eth.account.sign_transaction(transaction, private_key)
     raw_tx = getattr(signed_transaction, 'rawTransaction', None) or signed_transaction.raw_transaction
-    transaction_hash = web3.eth.send_raw_transaction(raw_tx)
-    receipt = web3.eth.wait_for_transaction_receipt(transaction_hash)
-    return receipt
+    return web3.eth.send_raw_transaction(raw_tx)
 
-def read_file(path):
-    """Read file contents"""
-    with open(path, "r") as file:
-        return file.read()
+def to_hex_hash(transaction_hash):
+    """Get lower case 0x hex string of a transaction hash given as bytes or hex string"""
+    if isinstance(transaction_hash, str):
+        return transaction_hash.lower()
+    return Web3.to_hex(transaction_hash)
 
-def get_owner_account():
+def get_receipts(transaction_hashes):
     """
-    Get owner's Ethereum account address and private key.
-    Also ensures the owner account has sufficient funds.
+    Get receipts of several transactions with one batched eth_getTransactionReceipt request.
+    Returns a list in the order of transaction_hashes, None for transactions that are not mined yet.
+    Falls back to one get_receipt request per transaction when the web3 version has no receipt_formatter.
     """
+    if receipt_formatter is None:
+        return [get_receipt(transaction_hash) for transaction_hash in transaction_hashes]
 
     web3 = get_web3()
+    hashes = [to_hex_hash(transaction_hash) for transaction_hash in transaction_hashes]
 
-    try:
-        with open("owner_account.json", "r") as file:
-            keystore = json.load(file)
-    except FileNotFoundError:
-        raise Exception("Owner account file not found")
+    receipts = []
+    for response in web3.provider.make_batch_request("eth_getTransactionReceipt", [[h] for h in hashes]):
+        if "error" in response:
+            raise Exception(f"eth_getTransactionReceipt failed: {response['error']}")
 
-    # decrypt with password
-    try:
-        private_key_bytes = Account.decrypt(keystore, 'iepblockchain')
-        private_key = private_key_bytes.hex()
-    except Exception as e:
-        raise Exception(f"Failed to decrypt owner account: {str(e)}")
-
-    # get address
-    address = web3.to_checksum_address(keystore['address'])
-
-    # check balance
-    balance = web3.eth.get_balance(address)
-
-    # if balance is low, fund from ganache account[0]
-    if balance <= web3.to_wei(1, "ether"):
-        try:
-            # transfer to 10 eth from first Ganache account
-            tx_hash = web3.eth.send_transaction({
-                "from": web3.eth.accounts[0],
-                "to": address,
-                "value": web3.to_wei(10, "ether"),
-                "gas": 210000,
-                "gasPrice": web3.eth.gas_price
-            })
-            web3.eth.wait_for_transaction_receipt(tx_hash)
-            print(f"Funded owner account {address} with 10 ETH")
-        except Exception as e:
-            print(f"Warning: Could not fund owner account: {str(e)}")
-
-    return (address, private_key)
-
-def is_valid_address(address):
-    """Validate eth address format"""
-    if not address or not isinstance(address, str):
-        return False
-
-    # check if it's a valid hex string and correct length
-    if not address.startswith("0x"):
-        address = "0x" + address
-
-    if len(address) != 42:
-        return False
+        result = response.get("result")
+        receipts.append(AttributeDict.recursive(receipt_formatter(result)) if result else None)
+
+    return receipts
 
+def get_receipt(transaction_hash):
+    """Get receipt of one transaction with a plain eth_getTransactionReceipt request, None if not mined yet"""
+    web3 = get_web3()
     try:
-        # try to convert to checksum address
-        web3 = get_web3()
-        web3.to_checksum_address(address)
-        return True
-    except:
-        return False
+        return web3.eth.get_transaction_receipt(transaction_hash)
+    except TransactionNotFound:
+        return None
 
+def read_file(path):
+    """Read file contents"""
+    with open(path, "r") as file:
+        return file.read()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Compare gas and latency of per-order OrderPayment deployment, OrderPaymentFactory clones
+and OrderRegistry entries
+Usage: python utils/benchmark_order_deployment.py [orders]
+"""
+import os
+import statistics
+import sys
+import time
+
+# Run from the repository root so blockchain/output and owner_account.json are found
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIRECTORY)
+os.chdir(ROOT_DIRECTORY)
+
+os.environ.setdefault("NONCE_BACKEND", "local")
+
+from decimal import Decimal
+
+from contracts import deploy_order_factory, deploy_order_registry, send_order_deployment, send_order_clone
+from contracts import send_order_registration
+from utilities import get_web3
+
+CUSTOMER_ADDRESS = "0x000000000000000000000000000000000000dEaD"
+ORDER_PRICE = Decimal("123.45")
+
+
+def measure(create_order, orders):
+    """Create orders one by one, returns (gas used, seconds) per order"""
+    results = []
+    for _ in range(orders):
+        start = time.perf_counter()
+        receipt = create_order()
+        results.append((receipt['gasUsed'], time.perf_counter() - start))
+    return results
+
+
+def report(name, results):
+    gas = [gas for gas, _ in results]
+    latency = [seconds * 1000 for _, seconds in results]
+    print(f"{name:<10} gas avg {statistics.mean(gas):>10.0f}   latency avg {statistics.mean(latency):>8.1f} ms"
+          f"   p50 {statistics.median(latency):>8.1f} ms   max {max(latency):>8.1f} ms")
+
+
+if __name__ == "__main__":
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    web3 = get_web3()
+    print(f"Connected: {web3.is_connected()}, creating {orders} orders per mode")
+
+    factory_address = deploy_order_factory()
+    print(f"Factory deployed at {factory_address}")
+
+    registry_address = deploy_order_registry()
+    print(f"Registry deployed at {registry_address}")
+    order_ids = iter(range(1, orders + 1))
+
+    deploy_results = measure(lambda: send_order_deployment(CUSTOMER_ADDRESS, ORDER_PRICE), orders)
+    clone_results = measure(lambda: send_order_clone(CUSTOMER_ADDRESS, ORDER_PRICE, factory_address)[1], orders)
+    registry_results = measure(
+        lambda: send_order_registration(next(order_ids), CUSTOMER_ADDRESS, ORDER_PRICE, registry_address)[1],
+        orders
+    )
+
+    report("deploy", deploy_results)
+    report("clone", clone_results)
+    report("registry", registry_results)
+
+    deploy_gas = statistics.mean(gas for gas, _ in deploy_results)
+    for name, results in (("Clones", clone_results), ("Registry entries", registry_results)):
+        saving = 1 - statistics.mean(gas for gas, _ in results) / deploy_gas
+        print(f"{name} use {saving:.0%} less gas per order")
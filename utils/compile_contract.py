@@ -1,42 +1,88 @@
 #!/usr/bin/env python3
 """
-Compile Solidity smart contract
+Compile Solidity smart contracts
+Every contract of every file in blockchain/contracts is saved as blockchain/output/<Contract>.abi/.bin
+and the sha256 of its bytecode is recorded in blockchain/output/manifest.json
+Files are compiled with solc 0.8.18 for the paris EVM.
+Usage: python compile_contract.py [file ...]   (default: every file, other manifest entries are kept)
 """
+import hashlib
 import json
+import os
+import sys
+
 from solcx import compile_source, install_solc, set_solc_version
 
-# Install specific version
-print("Installing Solidity compiler version 0.8.18...")
-install_solc('0.8.18')
-set_solc_version('0.8.18')
-
-# Read contract source
-print("Reading contract source...")
-with open('../blockchain/contracts/OrderPayment.sol', 'r') as f:
-    contract_source = f.read()
-
-# Compile contract
-print("Compiling contract...")
-compiled_sol = compile_source(
-    contract_source,
-    output_values=['abi', 'bin']
-)
-
-# Get contract interface
-contract_id, contract_interface = compiled_sol.popitem()
-
-# Save ABI
-abi = contract_interface['abi']
-with open('../blockchain/output/OrderPayment.abi', 'w') as f:
-    json.dump(abi, f, indent=2)
-print("ABI saved to blockchain/output/OrderPayment.abi")
-
-# Save bytecode
-bytecode = contract_interface['bin']
-with open('../blockchain/output/OrderPayment.bin', 'w') as f:
-    f.write(bytecode)
-print("Bytecode saved to blockchain/output/OrderPayment.bin")
-
-print("\nContract compiled successfully!")
-print(f"ABI length: {len(json.dumps(abi))} characters")
-print(f"Bytecode length: {len(bytecode)} characters")
\ No newline at end of file
+CONTRACTS_DIRECTORY = '../blockchain/contracts'
+OUTPUT_DIRECTORY = '../blockchain/output'
+MANIFEST_FILE = f'{OUTPUT_DIRECTORY}/manifest.json'
+
+SOLC_VERSION = '0.8.18'
+EVM_VERSION = 'paris'
+
+
+def compile_solidity(contract_source):
+    """Get {contract name: (abi, bytecode)} of a Solidity source"""
+    # Install specific version
+    print(f"Installing Solidity compiler version {SOLC_VERSION}...")
+    install_solc(SOLC_VERSION)
+    set_solc_version(SOLC_VERSION)
+
+    compiled_sol = compile_source(
+        contract_source,
+        output_values=['abi', 'bin'],
+        evm_version=EVM_VERSION
+    )
+
+    # ids look like '<stdin>:OrderPayment', interfaces have no bytecode and are skipped
+    return {
+        contract_id.split(':')[-1]: (contract_interface['abi'], contract_interface['bin'])
+        for contract_id, contract_interface in compiled_sol.items()
+        if contract_interface['bin']
+    }
+
+
+if __name__ == "__main__":
+    file_names = sys.argv[1:] or sorted(
+        file_name for file_name in os.listdir(CONTRACTS_DIRECTORY) if file_name.endswith('.sol')
+    )
+
+    manifest = {}
+    if os.path.exists(MANIFEST_FILE):
+        with open(MANIFEST_FILE, 'r') as f:
+            manifest = json.load(f)
+
+    for file_name in file_names:
+        file_name = os.path.basename(file_name)
+
+        # Read contract source
+        print(f"\nReading contract source {file_name}...")
+        with open(os.path.join(CONTRACTS_DIRECTORY, file_name), 'r') as f:
+            contract_source = f.read()
+
+        # Compile contract
+        print("Compiling contract...")
+        contracts = compile_solidity(contract_source)
+
+        for contract_name, (abi, bytecode) in contracts.items():
+            # Save ABI
+            with open(f'{OUTPUT_DIRECTORY}/{contract_name}.abi', 'w') as f:
+                json.dump(abi, f, indent=2)
+            print(f"ABI saved to blockchain/output/{contract_name}.abi")
+
+            # Save bytecode
+            with open(f'{OUTPUT_DIRECTORY}/{contract_name}.bin', 'w') as f:
+                f.write(bytecode)
+            print(f"Bytecode saved to blockchain/output/{contract_name}.bin")
+
+            manifest[contract_name] = hashlib.sha256(bytecode.strip().encode('utf-8')).hexdigest()
+
+            print(f"ABI length: {len(json.dumps(abi))} characters")
+            print(f"Bytecode length: {len(bytecode)} characters")
+
+    # Services refuse to start with bytecode that does not match the manifest
+    with open(MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print("Bytecode hashes saved to blockchain/output/manifest.json")
+
+    print("\nContracts compiled successfully!")
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Deploy OrderRegistry from the owner account
+Run with CONTRACT_MODE=registry and ORDER_REGISTRY_ADDRESS=<printed address> afterwards
+"""
+import os
+import sys
+
+# Run from the repository root so blockchain/output and owner_account.json are found
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIRECTORY)
+os.chdir(ROOT_DIRECTORY)
+
+os.environ.setdefault("NONCE_BACKEND", "local")
+
+from contracts import deploy_order_registry
+
+
+if __name__ == "__main__":
+    registry_address = deploy_order_registry()
+    print(f"OrderRegistry deployed at {registry_address}")
+    print(f"export ORDER_REGISTRY_ADDRESS={registry_address}")
@@ -2,7 +2,8 @@
 """
 Test script to verify blockchain connectivity
 """
-from utilities import get_web3, get_owner_account
+from utilities import get_web3
+from wallet import get_owner_account
 
 
 def test_blockchain_connection():
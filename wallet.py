@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+
+from eth_account import Account
+
+from configuration import OWNER_KEYSTORE, OWNER_KEYSTORE_PASSWORD
+from configuration import TREASURY_INTERVAL, TREASURY_MIN_BALANCE, TREASURY_TOP_UP
+from gas import gas_oracle
+from utilities import get_web3
+
+
+class OwnerKeyManager:
+    """
+    Owner account key, decrypted once per process and kept in memory.
+    Account.decrypt runs a deliberately slow scrypt KDF, so it must not run per request.
+    """
+
+    def __init__(self, keystore_path, password):
+        self.keystore_path = keystore_path
+        self.password = password
+        self._account = None
+        self._lock = threading.Lock()
+
+    def get_account(self):
+        """Get (address, private key) of the owner, decrypting the keystore on first use"""
+        account = self._account
+        if account is not None:
+            return account
+
+        with self._lock:
+            if self._account is None:
+                self._account = self._decrypt()
+            return self._account
+
+    def _decrypt(self):
+        try:
+            with open(self.keystore_path, "r") as file:
+                keystore = json.load(file)
+        except FileNotFoundError:
+            raise Exception("Owner account file not found")
+
+        # decrypt with password
+        try:
+            private_key = Account.decrypt(keystore, self.password).hex()
+        except Exception as e:
+            raise Exception(f"Failed to decrypt owner account: {str(e)}")
+
+        address = get_web3().to_checksum_address(keystore['address'])
+
+        return address, private_key
+
+
+class Treasury(threading.Thread):
+    """
+    Keeps the owner account funded from the node's first (Ganache) account in the background.
+    Every `interval` seconds the balance is checked, at or below `min_balance` ether
+    `top_up` ether are transferred.
+    """
+
+    def __init__(self, keys, interval, min_balance, top_up):
+        super().__init__(name="treasury", daemon=True)
+        self.keys = keys
+        self.interval = interval
+        self.min_balance = min_balance
+        self.top_up = top_up
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Warning: Could not fund owner account: {str(e)}")
+
+    def check(self):
+        """Top up owner balance if it is low, returns True when funds were sent"""
+        web3 = get_web3()
+        address, _ = self.keys.get_account()
+
+        if web3.eth.get_balance(address) > web3.to_wei(self.min_balance, "ether"):
+            return False
+
+        tx_hash = web3.eth.send_transaction({
+            "from": web3.eth.accounts[0],
+            "to": address,
+            "value": web3.to_wei(self.top_up, "ether"),
+            "gas": 210000,
+            **gas_oracle.fees()
+        })
+        web3.eth.wait_for_transaction_receipt(tx_hash)
+        print(f"Funded owner account {address} with {self.top_up} ETH")
+
+        return True
+
+
+# Owner hot wallet of this process
+owner_keys = OwnerKeyManager(OWNER_KEYSTORE, OWNER_KEYSTORE_PASSWORD)
+treasury = Treasury(owner_keys, TREASURY_INTERVAL, TREASURY_MIN_BALANCE, TREASURY_TOP_UP)
+
+_treasury_lock = threading.Lock()
+
+
+def start_treasury():
+    """Fund the owner account once if needed and start background top-ups, only the first call does work"""
+    if treasury.is_alive():
+        return
+
+    with _treasury_lock:
+        if treasury.is_alive():
+            return
+
+        # first check runs inline, so the first transaction of a fresh chain does not run out of funds
+        try:
+            treasury.check()
+        except Exception as e:
+            print(f"Warning: Could not fund owner account: {str(e)}")
+
+        treasury.start()
+
+
+def get_owner_account():
+    """
+    Get owner's Ethereum account address and private key.
+    The keystore is decrypted only on the first call, balance top-ups run in the background.
+    """
+    account = owner_keys.get_account()
+    start_treasury()
+    return account